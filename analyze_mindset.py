@@ -1,20 +1,90 @@
+import argparse
+import itertools
+from collections import deque
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
-from train_model import MindsetModel
+from typing import Dict, List, Optional, Tuple
+from train_model import MindsetModel, TARGET_COLUMNS
 from collect_data import DataCollector
+from model_registry import get_model
+from mindset_analyzer.online_stats import CorrelationAccumulator, MetricSummary, lagged_correlation
 import os
 
+# matplotlib and seaborn are imported inside the plotting methods so that
+# importing the analyzer does not pay for them.
+
+def summarize_results(results: pd.DataFrame) -> Dict[str, MetricSummary]:
+    """Build streaming summaries of each predicted metric in one vectorized pass.
+
+    The summaries can then be kept up to date with ``MetricSummary.update``
+    as new predictions arrive, or merged across shards of a long history.
+    """
+    summaries = {}
+    for metric in TARGET_COLUMNS:
+        summaries[metric] = MetricSummary()
+        summaries[metric].update_batch(results[metric].to_numpy())
+    return summaries
+
+def save_heatmap(matrix: pd.DataFrame, path: str, title: str):
+    """Render a correlation heatmap to a file without a display or pyplot state."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import seaborn as sns
+
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    sns.heatmap(matrix, annot=True, fmt='.2f', cmap='coolwarm', center=0, vmin=-1, vmax=1, ax=ax)
+    ax.set_title(title)
+    fig.tight_layout()
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(path)
+
+def batch_insights(results: pd.DataFrame) -> pd.DataFrame:
+    """Summarise each user's predictions with vectorized group-by operations.
+
+    ``results`` is indexed by (user_id, timestamp) as returned by
+    ``MindsetAnalyzer.analyze_users``. Returns one row per user with the
+    sample count and, per metric, its mean, standard deviation and trend.
+    As in ``generate_insights``, a trend is 'rising' or 'falling' when the
+    least-squares change over the user's history exceeds one standard
+    deviation, and 'steady' otherwise.
+    """
+    users = results.index.get_level_values('user_id')
+    y = results[TARGET_COLUMNS]
+    x = y.groupby(users, sort=False).cumcount().to_numpy(dtype=float)
+    moments = pd.concat([y, y.mul(x, axis=0).add_suffix('_xy')], axis=1)
+    moments['x'] = x
+    moments['xx'] = x * x
+    grouped = moments.groupby(users, sort=False)
+    sums = grouped.sum()
+    count = grouped.size()
+    std = y.groupby(users, sort=False).std()
+
+    mean_x = sums['x'] / count
+    sxx = sums['xx'] - count * mean_x ** 2
+    insights = pd.DataFrame({'samples': count})
+    for metric in TARGET_COLUMNS:
+        mean_y = sums[metric] / count
+        slope = (sums[f'{metric}_xy'] - count * mean_x * mean_y) / sxx.where(sxx > 0)
+        change = slope * count
+        insights[f'{metric}_mean'] = mean_y
+        insights[f'{metric}_std'] = std[metric]
+        insights[f'{metric}_trend'] = np.select([change > std[metric], change < -std[metric]],
+                                                ['rising', 'falling'], 'steady')
+    insights.index.name = 'user_id'
+    return insights
+
 class MindsetAnalyzer:
     def __init__(self):
         self.model = MindsetModel()
         self.collector = DataCollector()
         
     def load_trained_model(self, model_path: str = "models"):
-        """Load the trained model."""
-        self.model.load_model(model_path)
+        """Load the trained model, shared with other analyzers in this process."""
+        self.model = get_model(model_path)
     
     def analyze_daily_patterns(self, date: datetime):
         """Analyze mindset patterns for a specific date."""
@@ -23,8 +93,8 @@ class MindsetAnalyzer:
         if not data:
             raise ValueError(f"No data found for date {date}")
         
-        # Prepare data for prediction
-        X, _ = self.model.prepare_data(data)
+        # Prepare data for prediction with the scaler fitted at training time
+        X = self.model.prepare_inference_data(data)
         if len(X) == 0:
             raise ValueError("No valid data sequences found")
         
@@ -33,101 +103,192 @@ class MindsetAnalyzer:
         
         # Create results DataFrame
         results = pd.DataFrame(predictions, columns=['mood_score', 'energy_level', 'focus_level', 'stress_level'])
-        results['timestamp'] = data['mindset']['timestamp'].iloc[self.model.sequence_length:]
+        results['timestamp'] = self.model.window_timestamps(data)
         
         return results
     
-    def visualize_patterns(self, results: pd.DataFrame, save_path: str = None):
-        """Visualize mindset patterns."""
-        plt.figure(figsize=(15, 10))
-        
-        # Plot each metric
-        metrics = ['mood_score', 'energy_level', 'focus_level', 'stress_level']
-        for i, metric in enumerate(metrics, 1):
-            plt.subplot(2, 2, i)
-            sns.lineplot(data=results, x='timestamp', y=metric)
-            plt.title(f'{metric.replace("_", " ").title()} Over Time')
-            plt.xticks(rotation=45)
-        
-        plt.tight_layout()
-        
-        if save_path:
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            plt.savefig(save_path)
-        else:
-            plt.show()
+    def _load_user_windows(self, user_id: str, start: datetime, end: datetime):
+        """Load one user's range and build its prediction windows and their timestamps."""
+        data = self.collector.load_range(start, end, user_id=user_id)
+        if 'mindset' not in data or len(data['mindset']) <= self.model.sequence_length:
+            return None, None
+        X = self.model.prepare_inference_data(data)
+        return X, self.model.window_timestamps(data)
     
-    def analyze_correlations(self, data: dict, results: pd.DataFrame):
-        """Analyze correlations between different factors and mindset."""
-        # Combine all features
-        all_features = pd.DataFrame()
+    def analyze_users(self, user_ids: List[str], start: datetime, end: datetime,
+                      workers: int = 8, batch_size: int = 4096,
+                      errors: Optional[Dict[str, Exception]] = None) -> pd.DataFrame:
+        """Predict mindset metrics for many users over the same range.
+
+        Users' data is loaded on a thread pool (at most ``2 * workers``
+        users in flight) while the model predicts. Windows from consecutive
+        users are stacked until about ``batch_size`` are pending, so the
+        model runs a few large forward passes. Users without enough data are
+        left out, as are users whose data fails to load; their exceptions
+        are collected in ``errors`` when it is given. Returns one row per
+        prediction, indexed by (user_id, timestamp).
+        """
+        from concurrent.futures import ThreadPoolExecutor
         
-        # Add mindset predictions
-        all_features['mood_score'] = results['mood_score']
-        all_features['energy_level'] = results['energy_level']
-        all_features['focus_level'] = results['focus_level']
-        all_features['stress_level'] = results['stress_level']
+        results = {'user_id': [], 'timestamp': [], 'predictions': []}
+        pending = []
         
-        # Add other features
-        for category in ['activity', 'social', 'physiological', 'environmental']:
-            if category in data:
-                df = data[category]
-                for col in df.select_dtypes(include=[np.number]).columns:
-                    all_features[f'{category}_{col}'] = df[col].iloc[self.model.sequence_length:]
+        def predict_pending():
+            X = np.concatenate([windows for _, windows, _ in pending])
+            predictions = self.model.predict(X, verbose=0, batch_size=min(len(X), batch_size))
+            counts = [len(windows) for _, windows, _ in pending]
+            results['user_id'].append(np.repeat([user for user, _, _ in pending], counts))
+            results['timestamp'].extend(timestamps for _, _, timestamps in pending)
+            results['predictions'].append(predictions)
+            pending.clear()
         
-        # Calculate correlations
-        correlations = all_features.corr()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            users = iter(user_ids)
+            loading = deque((user, pool.submit(self._load_user_windows, user, start, end))
+                            for user in itertools.islice(users, 2 * workers))
+            while loading:
+                user, future = loading.popleft()
+                for next_user in itertools.islice(users, 1):
+                    loading.append((next_user, pool.submit(self._load_user_windows, next_user, start, end)))
+                try:
+                    X, timestamps = future.result()
+                except Exception as e:
+                    if errors is not None:
+                        errors[user] = e
+                    continue
+                if X is None or len(X) == 0:
+                    continue
+                pending.append((user, X, timestamps))
+                if sum(len(windows) for _, windows, _ in pending) >= batch_size:
+                    predict_pending()
+            if pending:
+                predict_pending()
         
-        # Plot correlation heatmap
-        plt.figure(figsize=(12, 8))
-        sns.heatmap(correlations, annot=True, cmap='coolwarm', center=0)
-        plt.title('Correlation Heatmap of Mindset Factors')
-        plt.tight_layout()
-        plt.show()
+        if not results['predictions']:
+            return pd.DataFrame(columns=TARGET_COLUMNS, index=pd.MultiIndex.from_arrays(
+                [[], pd.DatetimeIndex([])], names=['user_id', 'timestamp']))
+        frame = pd.DataFrame(np.concatenate(results['predictions']), columns=TARGET_COLUMNS)
+        frame.index = pd.MultiIndex.from_arrays(
+            [np.concatenate(results['user_id']), np.concatenate(results['timestamp'])],
+            names=['user_id', 'timestamp'])
+        return frame
     
-    def generate_insights(self, results: pd.DataFrame, data: dict):
-        """Generate insights about mindset patterns."""
-        insights = []
+    def visualize_patterns(self, results: pd.DataFrame,
+                           save_path: str = "visualizations/daily_patterns.png") -> str:
+        """Save a plot of each predicted metric over time; see ``report_rendering``."""
+        from report_rendering import render_patterns
         
-        # Analyze mood patterns
-        mood_mean = results['mood_score'].mean()
-        mood_std = results['mood_score'].std()
-        insights.append(f"Average mood score: {mood_mean:.2f} (std: {mood_std:.2f})")
-        
-        # Analyze energy patterns
-        energy_mean = results['energy_level'].mean()
-        energy_std = results['energy_level'].std()
-        insights.append(f"Average energy level: {energy_mean:.2f} (std: {energy_std:.2f})")
-        
-        # Analyze focus patterns
-        focus_mean = results['focus_level'].mean()
-        focus_std = results['focus_level'].std()
-        insights.append(f"Average focus level: {focus_mean:.2f} (std: {focus_std:.2f})")
+        render_patterns(results, save_path)
+        return save_path
+    
+    def _correlation_block(self, data: dict, results: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+        """Stack predictions and the feature rows at their timestamps into one array.
+
+        Windows across gaps are left out of the predictions, so rows are
+        matched on ``results['timestamp']`` rather than by position.
+        """
+        rows = pd.Index(self.model.row_timestamps(data)).get_indexer(
+            pd.to_datetime(results['timestamp']).to_numpy(dtype='datetime64[ns]'))
+        if (rows < 0).any():
+            raise ValueError("Results have timestamps that are not in the data")
+        features = self.model.feature_matrix(data)[rows]
+        block = np.hstack([results[TARGET_COLUMNS].to_numpy(dtype=float), features])
+        return block, TARGET_COLUMNS + self.model.feature_columns
+
+    def analyze_correlations(self, data: dict, results: pd.DataFrame,
+                             save_path: str = None) -> pd.DataFrame:
+        """Correlate predicted mindset metrics with the input features.
+
+        Returns the correlation matrix; a heatmap is only rendered when
+        ``save_path`` is given.
+        """
+        block, columns = self._correlation_block(data, results)
+        accumulator = CorrelationAccumulator(len(columns))
+        accumulator.update(block)
+        correlations = pd.DataFrame(accumulator.correlation(), index=columns, columns=columns)
+
+        if save_path:
+            save_heatmap(correlations, save_path, 'Correlation Heatmap of Mindset Factors')
+        return correlations
+
+    def analyze_lagged_correlations(self, data: dict, results: pd.DataFrame,
+                                    lags=(timedelta(hours=1), timedelta(hours=3), timedelta(hours=6))
+                                    ) -> Dict[timedelta, pd.DataFrame]:
+        """Correlate each feature at time t with each predicted metric at t + lag.
+
+        Pairs are matched on timestamps, so samples without a prediction
+        exactly ``lag`` later are left out. Returns one (features x metrics)
+        matrix per lag.
+        """
+        block, columns = self._correlation_block(data, results)
+        targets, features = block[:, :len(TARGET_COLUMNS)], block[:, len(TARGET_COLUMNS):]
+        timestamps = pd.DatetimeIndex(pd.to_datetime(results['timestamp']))
+        lagged = {}
+        for lag in lags:
+            later = timestamps.get_indexer(timestamps + pd.Timedelta(lag))
+            paired = later >= 0
+            lagged[lag] = pd.DataFrame(lagged_correlation(features[paired], targets[later[paired]], 0),
+                                       index=columns[len(TARGET_COLUMNS):], columns=TARGET_COLUMNS)
+        return lagged
+    
+    def generate_insights(self, results: pd.DataFrame, data: dict,
+                          summaries: Dict[str, MetricSummary] = None):
+        """Generate insights about mindset patterns.
+
+        Pass ``summaries`` (see ``summarize_results``) maintained incrementally
+        to avoid rescanning ``results`` for long histories.
+        """
+        if summaries is None:
+            summaries = summarize_results(results)
         
-        # Analyze stress patterns
-        stress_mean = results['stress_level'].mean()
-        stress_std = results['stress_level'].std()
-        insights.append(f"Average stress level: {stress_mean:.2f} (std: {stress_std:.2f})")
+        insights = []
+        labels = {
+            'mood_score': 'mood score',
+            'energy_level': 'energy level',
+            'focus_level': 'focus level',
+            'stress_level': 'stress level'
+        }
+        for metric, label in labels.items():
+            summary = summaries[metric]
+            insights.append(f"Average {label}: {summary.stats.mean:.2f} (std: {summary.stats.std:.2f})")
+            
+            # Only call out a trend when it moved the metric by more than a
+            # standard deviation over the whole history
+            change = summary.trend.slope * summary.stats.count
+            if abs(change) > summary.stats.std:
+                direction = 'rising' if change > 0 else 'falling'
+                insights.append(f"{label.capitalize()} is {direction}; recent average {summary.ewma.value:.2f}")
         
         return insights
 
 def main():
+    parser = argparse.ArgumentParser(description="Analyze mindset patterns for one day.")
+    parser.add_argument('--date', type=datetime.fromisoformat, default=datetime.now(),
+                        help="day to analyze, as YYYY-MM-DD (default: today)")
+    parser.add_argument('--model-path', default="models", help="directory of the trained model")
+    parser.add_argument('--output', default="visualizations/daily_patterns.png",
+                        help="where to save the pattern plot")
+    args = parser.parse_args()
+    
     # Initialize analyzer
     analyzer = MindsetAnalyzer()
-    analyzer.load_trained_model()
+    analyzer.load_trained_model(args.model_path)
     
-    # Analyze today's patterns
-    today = datetime.now()
+    # Analyze the day's patterns
+    today = args.date
     results = analyzer.analyze_daily_patterns(today)
     
     # Load data for correlation analysis
     data = analyzer.collector.load_data(today)
     
     # Visualize patterns
-    analyzer.visualize_patterns(results, "visualizations/daily_patterns.png")
+    analyzer.visualize_patterns(results, args.output)
     
     # Analyze correlations
-    analyzer.analyze_correlations(data, results)
+    correlations = analyzer.analyze_correlations(
+        data, results, os.path.join(os.path.dirname(args.output), 'correlations.png'))
+    print("\nStrongest correlations with mood:")
+    print(correlations['mood_score'].drop('mood_score').sort_values(key=abs, ascending=False).head(5))
     
     # Generate insights
     insights = analyzer.generate_insights(results, data)
@@ -0,0 +1,127 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, NamedTuple
+
+PROGRESS_FILE = 'batch_progress.json'
+SUMMARY_FILE = 'batch_summary.json'
+
+class TrainingJob(NamedTuple):
+    """Train one user's model on one date range."""
+    user_id: str
+    start: datetime
+    end: datetime
+
+    @property
+    def key(self) -> str:
+        return f'{self.user_id}|{self.start.isoformat()}|{self.end.isoformat()}'
+
+def _init_worker(threads: int):
+    """Bound the TensorFlow and BLAS thread pools of a worker process."""
+    for var in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _train_job(job: TrainingJob, model_root: str, epochs: int, streaming: bool) -> Dict:
+    """Run one job in a worker process and report how it went."""
+    from train_model import train_model_for_range, train_model_streaming
+
+    model_dir = os.path.join(model_root, job.user_id)
+    started = time.perf_counter()
+    result = {'user_id': job.user_id, 'start': job.start.isoformat(), 'end': job.end.isoformat(),
+              'model_dir': model_dir}
+    try:
+        if streaming:
+            train_model_streaming(job.start, job.end, model_dir, epochs=epochs, user_id=job.user_id)
+        else:
+            train_model_for_range(job.start, job.end, model_dir, epochs=epochs, user_id=job.user_id)
+        result['status'] = 'done'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def _write_json(path: str, payload):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+def load_progress(model_root: str) -> Dict[str, Dict]:
+    """Load the results of jobs finished by earlier runs."""
+    path = os.path.join(model_root, PROGRESS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def train_users(jobs: List[TrainingJob], model_root: str = "models", workers: int = None,
+                threads_per_worker: int = 1, epochs: int = 50, streaming: bool = False) -> Dict:
+    """Train a model per job across a process pool.
+
+    Each worker runs its own TensorFlow runtime with bounded thread pools.
+    Progress is checkpointed after every job, so re-running with the same
+    jobs skips those already done. Models are written to
+    ``<model_root>/<user_id>`` and a timing summary to ``batch_summary.json``.
+    """
+    os.makedirs(model_root, exist_ok=True)
+    progress = load_progress(model_root)
+    pending = [job for job in jobs if progress.get(job.key, {}).get('status') != 'done']
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+    started = time.perf_counter()
+    if pending:
+        # TensorFlow is not fork-safe, so workers are spawned fresh
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(threads_per_worker,)) as pool:
+            futures = {pool.submit(_train_job, job, model_root, epochs, streaming): job
+                       for job in pending}
+            for future in as_completed(futures):
+                result = future.result()
+                progress[futures[future].key] = result
+                _write_json(os.path.join(model_root, PROGRESS_FILE), progress)
+                print(f"{result['user_id']}: {result['status']} in {result['seconds']:.1f}s")
+
+    results = [progress[job.key] for job in jobs if job.key in progress]
+    summary = {
+        'jobs': len(jobs),
+        'done': sum(r['status'] == 'done' for r in results),
+        'failed': sum(r['status'] == 'failed' for r in results),
+        'skipped': len(jobs) - len(pending),
+        'wall_seconds': time.perf_counter() - started,
+        'job_seconds': sum(r['seconds'] for r in results),
+        'results': results,
+    }
+    _write_json(os.path.join(model_root, SUMMARY_FILE), summary)
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train one model per user in parallel.")
+    parser.add_argument('users', nargs='+', help="user ids to train")
+    parser.add_argument('--start', type=datetime.fromisoformat, required=True)
+    parser.add_argument('--end', type=datetime.fromisoformat, required=True)
+    parser.add_argument('--model-root', default='models')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--streaming', action='store_true',
+                        help="stream windows from the data store instead of loading each range")
+    args = parser.parse_args()
+
+    jobs = [TrainingJob(user, args.start, args.end) for user in args.users]
+    summary = train_users(jobs, args.model_root, args.workers, args.threads_per_worker,
+                          args.epochs, args.streaming)
+    print(f"{summary['done']} done, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"in {summary['wall_seconds']:.1f}s")
@@ -0,0 +1,71 @@
+"""
+Guard module import time using ``python -X importtime``.
+
+Each module is imported in a fresh interpreter from the repository root. The
+script fails if a module's cumulative import time exceeds its budget or if it
+pulls in one of the heavy libraries that should only load on demand.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [--scale 1.0]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets in milliseconds (best of --repeat runs).
+BUDGETS_MS = {
+    'mindset_analyzer': 50,
+    'train_model': 1000,
+    'analyze_mindset': 1000,
+    'numpy_model': 300,
+}
+
+HEAVY_MODULES = ['tensorflow', 'keras', 'matplotlib', 'seaborn', 'sklearn']
+
+LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def import_profile(module: str):
+    """Return (cumulative microseconds, set of imported module names)."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    cumulative = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name)
+        if name == module:
+            cumulative = int(match.group(2))
+    return cumulative, imported
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="multiply every budget, e.g. on slow CI machines")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':>20} {'best ms':>10} {'budget ms':>10}  heavy imports")
+    for module, budget in BUDGETS_MS.items():
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        best = min(cumulative for cumulative, _ in runs) / 1000
+        heavy = sorted(name for name in runs[0][1] if name.split('.')[0] in HEAVY_MODULES
+                       and '.' not in name)
+        over = best > budget * args.scale
+        failed = failed or over or bool(heavy)
+        status = 'FAIL' if over or heavy else 'ok'
+        print(f"{module:>20} {best:>10.1f} {budget * args.scale:>10.0f}  "
+              f"{', '.join(heavy) or '-'}  {status}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
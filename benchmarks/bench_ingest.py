@@ -0,0 +1,84 @@
+"""
+Benchmark batched ingestion against one transaction per sample.
+
+Generates hourly samples with several metrics and writes them to a
+temporary metrics store three ways: one insert per sample, batches parsed
+from JSON, and batches parsed from npz columns. Parsing, validation,
+deduplication and the write are all included in the batched timings.
+
+Usage:
+    python benchmarks/bench_ingest.py [--samples 20000] [--batch-size 2000]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mindset_analyzer import ingest
+from mindset_analyzer.metrics_store import MetricsStore
+
+METRICS = ['mindset_score', 'energy_level', 'focus_level', 'stress_level']
+
+def make_samples(n: int):
+    start = datetime(2025, 1, 1)
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 100, (n, len(METRICS)))
+    timestamps = [start + timedelta(hours=h) for h in range(n)]
+    return timestamps, values
+
+def json_payload(timestamps, values) -> bytes:
+    return json.dumps({'samples': [
+        {'timestamp': ts.isoformat(), 'metrics': dict(zip(METRICS, row.tolist()))}
+        for ts, row in zip(timestamps, values)]}).encode()
+
+def npz_payload(timestamps, values) -> bytes:
+    buf = io.BytesIO()
+    np.savez(buf, timestamp=np.array(timestamps, dtype='datetime64[s]'), category=np.array('dashboard'),
+             **{metric: values[:, i] for i, metric in enumerate(METRICS)})
+    return buf.getvalue()
+
+def new_store() -> MetricsStore:
+    return MetricsStore(os.path.join(tempfile.mkdtemp(prefix='mindset_bench_'), 'metrics.db'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    timestamps, values = make_samples(args.samples)
+    batches = [(timestamps[i:i + args.batch_size], values[i:i + args.batch_size])
+               for i in range(0, args.samples, args.batch_size)]
+    print(f"{args.samples} samples x {len(METRICS)} metrics, batches of {args.batch_size}")
+    print(f"{'method':>18} {'seconds':>10} {'samples/s':>12}")
+
+    def report(name, seconds):
+        print(f"{name:>18} {seconds:>10.2f} {args.samples / seconds:>12,.0f}")
+
+    store = new_store()
+    start = time.perf_counter()
+    for ts, row in zip(timestamps, values):
+        store.insert_many(('bench', 'dashboard', ts, metric, value)
+                          for metric, value in zip(METRICS, row.tolist()))
+    report('per sample', time.perf_counter() - start)
+
+    for name, encode, parse in (('json batches', json_payload, lambda body: ingest.parse_json(json.loads(body))),
+                                ('npz batches', npz_payload, ingest.parse_npz)):
+        bodies = [encode(*batch) for batch in batches]
+        store = new_store()
+        start = time.perf_counter()
+        for body in bodies:
+            ingest.ingest(store, 'bench', parse(body))
+        report(name, time.perf_counter() - start)
+        print(f"{'':>18} payload {sum(map(len, bodies)) / args.samples:.0f} bytes/sample")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark bulk inserts and time-range queries on the SQLite metrics store.
+
+Fills a temporary database with hourly metrics for many users (1.2M rows by
+default) and reports insert throughput plus latency percentiles for common
+dashboard queries on random users.
+
+Usage:
+    python benchmarks/bench_metrics_store.py [--users 50] [--days 250] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mindset_analyzer.metrics_store import MetricsStore
+
+METRICS = ['mindset_score', 'energy_level', 'focus_level', 'stress_level']
+
+def fill(store: MetricsStore, users: int, days: int) -> int:
+    end = datetime(2026, 1, 1)
+    timestamps = [end - timedelta(hours=h) for h in range(days * 24)]
+    rng = np.random.default_rng(0)
+    rows = 0
+    for user in range(users):
+        values = {metric: rng.uniform(0, 100, len(timestamps)).tolist() for metric in METRICS}
+        rows += store.insert_points(f'user{user}', 'dashboard', timestamps, values)
+    return rows
+
+def timed(func, queries: int):
+    latencies = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return np.percentile(np.array(latencies) * 1000, [50, 95])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--days', type=int, default=250)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='mindset_bench_'), 'metrics.db')
+    store = MetricsStore(path)
+    start = time.perf_counter()
+    rows = fill(store, args.users, args.days)
+    elapsed = time.perf_counter() - start
+    print(f"inserted {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+    end = datetime(2026, 1, 1)
+    user = lambda: f'user{random.randrange(args.users)}'
+    cases = {
+        'latest': lambda: store.latest(user(), 'dashboard'),
+        'range 1 day': lambda: store.query_range(user(), 'dashboard', end - timedelta(days=1), end),
+        'range 7 days': lambda: store.query_range(user(), 'dashboard', end - timedelta(days=7), end),
+        'daily means 30 days': lambda: store.daily_means(user(), 'dashboard',
+                                                         end - timedelta(days=30), end),
+    }
+    print(f"{'query':>22} {'p50 ms':>10} {'p95 ms':>10}")
+    for name, query in cases.items():
+        p50, p95 = timed(query, args.queries)
+        print(f"{name:>22} {p50:>10.2f} {p95:>10.2f}")
+
+if __name__ == "__main__":
+    main()
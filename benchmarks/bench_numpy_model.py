@@ -0,0 +1,115 @@
+"""
+Benchmark serving the NumPy export of the model against Keras on CPU.
+
+Saves an untrained model (which writes both mindset_model.h5 and the
+mindset_model.npz export) and then, for each backend in a fresh
+interpreter, measures cold start (imports plus loading through the model
+registry), resident memory once loaded, single-window latency via
+``predict_window`` and batched throughput via ``predict``. Also reports the
+largest difference between the two backends' predictions.
+
+Usage:
+    python benchmarks/bench_numpy_model.py [--features 12] [--windows 500] [--batch 256]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BACKENDS = ['numpy', 'keras']
+
+def rss_mib() -> float:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+def measure(backend: str, path: str, windows: int, batch: int):
+    """Run in the child interpreter; prints one JSON line of results."""
+    start = time.perf_counter()
+    import numpy as np
+    from model_registry import get_model
+
+    model = get_model(path, backend)
+    n_features = len(model.scaler.mean_)
+    X = np.random.default_rng(0).standard_normal((batch, model.sequence_length, n_features)).astype(np.float32)
+    model.predict_window(X[0])
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for i in range(windows):
+        started = time.perf_counter()
+        model.predict_window(X[i % batch])
+        latencies.append(time.perf_counter() - started)
+    model.predict(X, verbose=0, batch_size=batch)
+    started = time.perf_counter()
+    predictions = model.predict(X, verbose=0, batch_size=batch)
+    batch_seconds = time.perf_counter() - started
+
+    np.save(os.path.join(path, f'bench_{backend}.npy'), predictions)
+    print(json.dumps({
+        'cold_start': cold_start,
+        'rss': rss_mib(),
+        'p50': float(np.percentile(latencies, 50)),
+        'p99': float(np.percentile(latencies, 99)),
+        'windows_per_s': batch / batch_seconds,
+        'tensorflow_loaded': 'tensorflow' in sys.modules,
+    }))
+
+def make_model_dir(n_features: int) -> str:
+    import numpy as np
+    from train_model import MindsetModel
+
+    model = MindsetModel()
+    model.scaler.fit(np.random.default_rng(0).standard_normal((1000, n_features)))
+    model.build_model((model.sequence_length, n_features), 4)
+    path = tempfile.mkdtemp(prefix='mindset_bench_')
+    model.save_model(path)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--features', type=int, default=12)
+    parser.add_argument('--windows', type=int, default=500, help="single-window predictions timed")
+    parser.add_argument('--batch', type=int, default=256)
+    parser.add_argument('--make-model', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.make_model or args.child:
+        sys.path.insert(0, REPO_ROOT)
+        if args.make_model:
+            print(make_model_dir(args.features))
+        else:
+            measure(args.child[0], args.child[1], args.windows, args.batch)
+        return
+
+    # Saving needs TensorFlow, so do it in a child too and keep this process light
+    path = subprocess.run([sys.executable, os.path.abspath(__file__), '--make-model',
+                           '--features', str(args.features)],
+                          cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+
+    print(f"{args.features} features, {args.windows} single windows, batches of {args.batch}")
+    print(f"{'backend':>8} {'cold start (s)':>15} {'RSS (MiB)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'windows/s':>10} {'TF loaded':>10}")
+    for backend in BACKENDS:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', backend, path,
+                               '--windows', str(args.windows), '--batch', str(args.batch)],
+                              cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{backend:>8} {r['cold_start']:>15.2f} {r['rss']:>10.0f} {r['p50'] * 1000:>9.2f} "
+              f"{r['p99'] * 1000:>9.2f} {r['windows_per_s']:>10,.0f} {str(r['tensorflow_loaded']):>10}")
+
+    import numpy as np
+    difference = np.abs(np.load(os.path.join(path, 'bench_numpy.npy'))
+                        - np.load(os.path.join(path, 'bench_keras.npy'))).max()
+    print(f"max |numpy - keras| = {difference:.2e}")
+
+if __name__ == "__main__":
+    main()
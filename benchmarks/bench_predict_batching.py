@@ -0,0 +1,88 @@
+"""
+Load-test /api/predict with and without request micro-batching.
+
+Starts the Flask app on a local port with an in-memory metrics store and a
+freshly initialised (untrained) model in a temporary directory, then fires concurrent single-window requests from client threads and
+reports throughput and latency percentiles for each mode.
+
+Usage:
+    python benchmarks/bench_predict_batching.py [--clients 32] [--requests 1000]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+
+from mindset_analyzer.web import create_app
+from train_model import MindsetModel
+
+N_FEATURES = 12
+
+def make_model_dir() -> str:
+    """Save an untrained model with a fitted scaler to a temporary directory."""
+    model = MindsetModel()
+    model.scaler.fit(np.random.default_rng(0).standard_normal((1000, N_FEATURES)))
+    model.build_model((model.sequence_length, N_FEATURES), 4)
+    path = tempfile.mkdtemp(prefix='mindset_bench_')
+    model.save_model(path)
+    return path
+
+def run(model_path: str, batching: bool, clients: int, requests: int, max_wait_ms: float):
+    # The testing config keeps the metrics store in memory, and the model is
+    # the temporary one, so nothing under the app's data or models is touched
+    app = create_app('testing')
+    app.config.update(DEBUG=False, MODEL_PATH=model_path, PREDICT_BATCHING=batching,
+                      PREDICT_MAX_BATCH_SIZE=clients, PREDICT_MAX_WAIT_MS=max_wait_ms)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/api/predict'
+    body = json.dumps({'features': np.random.rand(24, N_FEATURES).tolist()}).encode()
+
+    def call(_):
+        start = time.perf_counter()
+        req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+        return time.perf_counter() - start
+
+    # Warm up the model load and the serving thread
+    for _ in range(3):
+        call(None)
+
+    with ThreadPoolExecutor(clients) as pool:
+        start = time.perf_counter()
+        latencies = np.array(list(pool.map(call, range(requests))))
+        elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    p50, p95 = np.percentile(latencies * 1000, [50, 95])
+    mode = 'batched' if batching else 'per-request'
+    print(f"{mode:>12} {requests / elapsed:>10.1f} {p50:>10.1f} {p95:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    model_path = make_model_dir()
+    print(f"{'mode':>12} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for batching in (False, True):
+        run(model_path, batching, args.clients, args.requests, args.max_wait_ms)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark the shared ring buffers of recent metrics against per-user dicts.
+
+Fills ``history`` hourly samples per user into RecentMetrics and into the
+obvious alternative, a dict of deques of {metric: value} dicts per user,
+and reports traced memory, append throughput and the time to read the
+latest sample of every user and the last ``history`` samples of a batch
+of users.
+
+Usage:
+    python benchmarks/bench_recent_metrics.py [--users 100000] [--history 24] [--batch 1000]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mindset_analyzer.recent_metrics import RecentMetrics
+
+METRICS = ['mindset_score', 'energy_level', 'focus_level', 'stress_level',
+           'sleep_hours', 'exercise_minutes', 'social_interactions']
+
+START = 1735689600
+
+def fill_rings(users, values):
+    recent = RecentMetrics(METRICS, values.shape[1])
+    for u, user_id in enumerate(users):
+        recent.extend(user_id, START + 3600 * np.arange(values.shape[1]), values[u])
+    return recent
+
+def fill_dicts(users, values):
+    recent = {}
+    for u, user_id in enumerate(users):
+        samples = recent[user_id] = deque(maxlen=values.shape[1])
+        for h, row in enumerate(values[u].tolist()):
+            samples.append((START + 3600 * h, dict(zip(METRICS, row))))
+    return recent
+
+def traced(fill, *args):
+    tracemalloc.start()
+    result = fill(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def best_of(fn, repeat=3) -> float:
+    # Collect first so a pass over the dicts' objects is not charged to whichever runs next
+    gc.collect()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--history', type=int, default=24)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    users = [f'user{i:06d}' for i in range(args.users)]
+    values = np.random.default_rng(0).uniform(0, 100, (args.users, args.history, len(METRICS))).astype(np.float32)
+    batch = users[:args.batch]
+    print(f"{args.users} users x {args.history} samples x {len(METRICS)} metrics")
+    print(f"{'structure':>14} {'MiB':>8} {'appends/s':>12} {'latest all (s)':>15} {'batch (ms)':>11}")
+
+    rings, ring_bytes = traced(fill_rings, users, values)
+    dicts, dict_bytes = traced(fill_dicts, users, values)
+    row = values[0, 0]
+    sample = dict(zip(METRICS, row.tolist()))
+
+    def ring_appends():
+        for user_id in users:
+            rings.append(user_id, START, row)
+
+    def dict_appends():
+        for user_id in users:
+            dicts[user_id].append((START, dict(sample)))
+
+    def ring_latest():
+        for user_id in users:
+            rings.latest(user_id)
+
+    def dict_latest():
+        for user_id in users:
+            dicts[user_id][-1]
+
+    def dict_batch():
+        np.array([[[s[1].get(metric, np.nan) for metric in METRICS] for s in dicts[user_id]]
+                  for user_id in batch], dtype=np.float32)
+
+    timings = {
+        'ring buffers': (ring_bytes, best_of(ring_appends), best_of(ring_latest),
+                         best_of(lambda: rings.latest_n(batch))),
+        'dict/deque': (dict_bytes, best_of(dict_appends), best_of(dict_latest), best_of(dict_batch)),
+    }
+    for name, (size, appends, latest, window) in timings.items():
+        print(f"{name:>14} {size / 2 ** 20:>8.1f} {args.users / appends:>12,.0f} {latest:>15.3f} "
+              f"{window * 1000:>11.2f}")
+
+if __name__ == "__main__":
+    main()
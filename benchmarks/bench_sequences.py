@@ -0,0 +1,66 @@
+"""
+Benchmark LSTM window construction: list-of-slices loop vs. strided views.
+
+Usage:
+    python benchmarks/bench_sequences.py [--rows 1000 100000 1000000] [--features 12]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from train_model import make_sequences, iter_sequence_batches
+
+SEQUENCE_LENGTH = 24
+
+def loop_sequences(X: np.ndarray, y: np.ndarray, sequence_length: int):
+    """The original loop from MindsetModel.prepare_data."""
+    X_sequences = []
+    y_sequences = []
+    for i in range(len(X) - sequence_length):
+        X_sequences.append(X[i:(i + sequence_length)])
+        y_sequences.append(y[i + sequence_length])
+    return np.array(X_sequences), np.array(y_sequences)
+
+def consume_batches(X: np.ndarray, y: np.ndarray, sequence_length: int):
+    """Walk every batch of the generator mode, as a training loop would."""
+    count = 0
+    for X_batch, _ in iter_sequence_batches(X, y, sequence_length, batch_size=256):
+        count += len(X_batch)
+    return count
+
+def measure(func, *args):
+    """Return (seconds, peak traced bytes) for a single call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--features', type=int, default=12)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>10} {'method':>10} {'time (s)':>10} {'peak MB':>10}")
+    for rows in args.rows:
+        X = rng.standard_normal((rows, args.features))
+        y = rng.uniform(size=(rows, 4))
+        for name, func in [('loop', loop_sequences),
+                           ('views', make_sequences),
+                           ('batches', consume_batches)]:
+            elapsed, peak = measure(func, X, y, SEQUENCE_LENGTH)
+            print(f"{rows:>10} {name:>10} {elapsed:>10.4f} {peak / 2**20:>10.1f}")
+
+if __name__ == "__main__":
+    main()
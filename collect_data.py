@@ -3,12 +3,46 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from data_store import StorageBackend, ColumnarStorage, DEFAULT_USER
+
+def align_categories(data: Dict[str, pd.DataFrame], tolerance: timedelta = timedelta(minutes=30),
+                     on: str = 'mindset', interval: timedelta = timedelta(hours=1),
+                     fill_limit: int = 1) -> Dict[str, pd.DataFrame]:
+    """Align every category onto a regular grid of ``interval`` steps.
+
+    The grid runs from the first to the last timestamp of ``data[on]``; each
+    category is joined with an as-of merge to the nearest sample within
+    ``tolerance``. Gaps of up to ``fill_limit`` steps are forward-filled
+    per category, so an isolated missing sample does not cost the row.
+    Timestamps still missing a category are then dropped, so the returned
+    frames are row-aligned by position but consecutive rows are not always
+    one interval apart; the ``timestamp`` column keeps the gaps visible (see
+    ``train_model.contiguous_windows``). With ``fill_limit=0`` the grid is
+    the timestamps of ``data[on]`` and nothing is filled.
+    """
+    if on not in data:
+        return data
+    base = data[on][['timestamp']].sort_values('timestamp', kind='stable')
+    if fill_limit and len(base):
+        base = pd.DataFrame({'timestamp': pd.date_range(base['timestamp'].iloc[0], base['timestamp'].iloc[-1],
+                                                        freq=pd.Timedelta(interval))})
+    merged = {}
+    for category, df in data.items():
+        merged[category] = pd.merge_asof(
+            base, df.sort_values('timestamp', kind='stable'), on='timestamp',
+            direction='nearest', tolerance=pd.Timedelta(tolerance))
+        if fill_limit:
+            merged[category] = merged[category].ffill(limit=fill_limit)
+
+    complete = np.logical_and.reduce([df.notna().all(axis=1).to_numpy() for df in merged.values()])
+    return {category: df[complete].reset_index(drop=True) for category, df in merged.items()}
 
 class DataCollector:
-    def __init__(self):
+    def __init__(self, storage: Optional[StorageBackend] = None):
         self.data_dir = "data"
         os.makedirs(self.data_dir, exist_ok=True)
+        self.storage = storage if storage is not None else ColumnarStorage(self.data_dir)
         
     def collect_activity_data(self, start_time: datetime, duration: timedelta) -> pd.DataFrame:
         """Collect activity data including steps, movement, and exercise."""
@@ -79,27 +113,40 @@ class DataCollector:
         }
         return data
     
-    def save_data(self, data: Dict[str, pd.DataFrame], date: datetime):
-        """Save collected data to files."""
-        date_str = date.strftime('%Y-%m-%d')
-        for category, df in data.items():
-            filename = os.path.join(self.data_dir, f'{category}_{date_str}.csv')
-            df.to_csv(filename, index=False)
+    def save_data(self, data: Dict[str, pd.DataFrame], date: datetime, user_id: str = DEFAULT_USER):
+        """Save collected data to the storage backend.
+
+        Rows are filed by their own timestamps; ``date`` is kept for
+        backwards compatibility.
+        """
+        self.storage.save(data, user_id)
+    
+    def load_data(self, date: datetime, user_id: str = DEFAULT_USER) -> Dict[str, pd.DataFrame]:
+        """Load data for a given date, from midnight to the following midnight."""
+        start = datetime.combine(date.date(), datetime.min.time())
+        return self.load_range(start, start + timedelta(days=1), user_id=user_id)
     
-    def load_data(self, date: datetime) -> Dict[str, pd.DataFrame]:
-        """Load data for a given date."""
-        date_str = date.strftime('%Y-%m-%d')
-        data = {}
-        for category in ['activity', 'social', 'physiological', 'environmental', 'mindset']:
-            filename = os.path.join(self.data_dir, f'{category}_{date_str}.csv')
-            if os.path.exists(filename):
-                data[category] = pd.read_csv(filename)
+    def load_range(self, start: datetime, end: datetime, categories: Optional[List[str]] = None,
+                   columns: Optional[List[str]] = None, user_id: str = DEFAULT_USER,
+                   align: bool = True, tolerance: timedelta = timedelta(minutes=30),
+                   fill_limit: int = 1) -> Dict[str, pd.DataFrame]:
+        """Load data with start <= timestamp <= end as one frame per category.
+
+        The whole range is read and concatenated in a single pass rather than
+        day by day. With ``align`` the categories are joined on the mindset
+        timestamps (see ``align_categories``) so sequences can cross midnight;
+        gaps of up to ``fill_limit`` hours are forward-filled.
+        """
+        data = self.storage.load_range(start, end, categories=categories, columns=columns,
+                                       user_id=user_id)
+        if align:
+            data = align_categories(data, tolerance, fill_limit=fill_limit)
         return data
 
 if __name__ == "__main__":
     # Example usage
     collector = DataCollector()
-    today = datetime.now()
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
     data = collector.collect_all_data(today)
     collector.save_data(data, today)
     print("Data collection completed successfully!") 
\ No newline at end of file
@@ -0,0 +1,260 @@
+import argparse
+import glob
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ['activity', 'social', 'physiological', 'environmental', 'mindset']
+
+DEFAULT_USER = 'default'
+
+# Column dtypes for every category, in storage order. Timestamps are stored
+# as int64 nanoseconds since the epoch.
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    'activity': {
+        'timestamp': 'datetime64[ns]',
+        'steps': 'int64',
+        'movement_level': 'float64',
+        'exercise_minutes': 'int64',
+    },
+    'social': {
+        'timestamp': 'datetime64[ns]',
+        'social_interactions': 'int64',
+        'message_count': 'int64',
+        'social_media_usage': 'int64',
+    },
+    'physiological': {
+        'timestamp': 'datetime64[ns]',
+        'heart_rate': 'int64',
+        'stress_level': 'float64',
+        'sleep_quality': 'float64',
+    },
+    'environmental': {
+        'timestamp': 'datetime64[ns]',
+        'temperature': 'float64',
+        'humidity': 'float64',
+        'light_level': 'float64',
+    },
+    'mindset': {
+        'timestamp': 'datetime64[ns]',
+        'mood_score': 'float64',
+        'energy_level': 'float64',
+        'focus_level': 'float64',
+        'stress_level': 'float64',
+    },
+}
+
+def conform(category: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Validate a frame against its category schema and cast to the stored dtypes."""
+    if category not in SCHEMAS:
+        raise ValueError(f"Unknown category: {category}")
+    schema = SCHEMAS[category]
+    missing = [col for col in schema if col not in df.columns]
+    if missing:
+        raise ValueError(f"{category} data is missing columns: {missing}")
+    out = pd.DataFrame({col: df[col].to_numpy() for col in schema})
+    out['timestamp'] = pd.to_datetime(out['timestamp'], format='ISO8601').astype('datetime64[ns]')
+    return out.astype(schema)
+
+def _check_user(user_id: str):
+    if not user_id or user_id.startswith('.') or '/' in user_id or os.sep in user_id:
+        raise ValueError(f"Invalid user id: {user_id!r}")
+
+class StorageBackend:
+    """Interface for mindset data storage backends."""
+
+    def write(self, category: str, df: pd.DataFrame, user_id: str = DEFAULT_USER):
+        """Store rows for a category, replacing rows with the same timestamp."""
+        raise NotImplementedError
+
+    def load_range(self, start: datetime, end: datetime,
+                   categories: Optional[List[str]] = None,
+                   columns: Optional[List[str]] = None,
+                   user_id: str = DEFAULT_USER) -> Dict[str, pd.DataFrame]:
+        """Load rows with start <= timestamp <= end for each category.
+
+        ``columns`` projects every category onto the given columns (plus
+        ``timestamp``); categories with no rows in range are left out.
+        """
+        raise NotImplementedError
+
+    def save(self, data: Dict[str, pd.DataFrame], user_id: str = DEFAULT_USER):
+        """Store every category in ``data``."""
+        for category, df in data.items():
+            self.write(category, df, user_id)
+
+class ColumnarStorage(StorageBackend):
+    """Binary column store partitioned by user, category and month.
+
+    Each partition is a directory ``user=<id>/<category>/<YYYY-MM>`` holding
+    one ``.npy`` file per column, sorted by timestamp, so range loads are a
+    binary search plus a memory-mapped slice per projected column. Writes
+    replace ``timestamp.npy`` after the other columns, and reads check that
+    every column has its length.
+    """
+
+    def __init__(self, root: str = "data"):
+        self.root = root
+
+    def _partition_dir(self, user_id: str, category: str, month: str) -> str:
+        return os.path.join(self.root, f'user={user_id}', category, month)
+
+    def _read_partition(self, path: str, columns: List[str], mmap_mode=None,
+                        attempts: int = 5) -> Dict[str, np.ndarray]:
+        # write() replaces timestamp.npy last, so columns whose length differs
+        # from it were read mid-write (retry) or left by an interrupted write.
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(0.01 * attempt)
+            arrays = {col: np.load(os.path.join(path, f'{col}.npy'), mmap_mode=mmap_mode)
+                      for col in ['timestamp'] + [col for col in columns if col != 'timestamp']}
+            if all(len(values) == len(arrays['timestamp']) for values in arrays.values()):
+                return arrays
+        raise ValueError(f"Partition {path} has columns of different lengths")
+
+    def write(self, category: str, df: pd.DataFrame, user_id: str = DEFAULT_USER):
+        _check_user(user_id)
+        df = conform(category, df)
+        if df.empty:
+            return
+        columns = list(SCHEMAS[category])
+        new = {col: df[col].to_numpy() for col in columns}
+        new['timestamp'] = new['timestamp'].astype('int64')
+        months = new['timestamp'].astype('datetime64[ns]').astype('datetime64[M]')
+
+        for month in np.unique(months):
+            mask = months == month
+            path = self._partition_dir(user_id, category, str(month))
+            chunk = {col: values[mask] for col, values in new.items()}
+            if os.path.exists(os.path.join(path, 'timestamp.npy')):
+                existing = self._read_partition(path, columns)
+                chunk = {col: np.concatenate([existing[col], chunk[col]]) for col in columns}
+
+            # Sort by time, keeping the most recently written row per timestamp
+            order = np.argsort(chunk['timestamp'], kind='stable')
+            ts = chunk['timestamp'][order]
+            keep = np.append(ts[1:] != ts[:-1], True)
+            os.makedirs(path, exist_ok=True)
+            for col in columns:
+                np.save(os.path.join(path, f'{col}.tmp.npy'), chunk[col][order][keep])
+            # Timestamps go last: a row count only changes once every column has it
+            for col in columns[1:] + columns[:1]:
+                os.replace(os.path.join(path, f'{col}.tmp.npy'), os.path.join(path, f'{col}.npy'))
+
+    def load_range(self, start: datetime, end: datetime,
+                   categories: Optional[List[str]] = None,
+                   columns: Optional[List[str]] = None,
+                   user_id: str = DEFAULT_USER) -> Dict[str, pd.DataFrame]:
+        _check_user(user_id)
+        start_ns = pd.Timestamp(start).as_unit('ns').value
+        end_ns = pd.Timestamp(end).as_unit('ns').value
+        months = np.arange(np.datetime64(start_ns, 'ns').astype('datetime64[M]'),
+                           np.datetime64(end_ns, 'ns').astype('datetime64[M]') + 1)
+
+        data = {}
+        for category in categories or CATEGORIES:
+            schema = SCHEMAS[category]
+            wanted = [col for col in schema if col != 'timestamp'
+                      and (columns is None or col in columns)]
+            parts = {col: [] for col in ['timestamp'] + wanted}
+            for month in months:
+                path = self._partition_dir(user_id, category, str(month))
+                if not os.path.exists(os.path.join(path, 'timestamp.npy')):
+                    continue
+                arrays = self._read_partition(path, list(parts), mmap_mode='r')
+                ts = arrays['timestamp']
+                lo = np.searchsorted(ts, start_ns, side='left')
+                hi = np.searchsorted(ts, end_ns, side='right')
+                if hi > lo:
+                    for col, values in arrays.items():
+                        parts[col].append(values[lo:hi])
+            if not parts['timestamp']:
+                continue
+            df = pd.DataFrame({col: np.concatenate(chunks) for col, chunks in parts.items()})
+            df['timestamp'] = df['timestamp'].astype('datetime64[ns]')
+            data[category] = df.astype({col: schema[col] for col in df.columns})
+        return data
+
+class CSVStorage(StorageBackend):
+    """Legacy layout of one ``<category>_<YYYY-MM-DD>.csv`` file per day."""
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+
+    def _user_dir(self, user_id: str) -> str:
+        _check_user(user_id)
+        if user_id == DEFAULT_USER:
+            return self.data_dir
+        return os.path.join(self.data_dir, user_id)
+
+    def write(self, category: str, df: pd.DataFrame, user_id: str = DEFAULT_USER):
+        df = conform(category, df)
+        directory = self._user_dir(user_id)
+        os.makedirs(directory, exist_ok=True)
+        for day, rows in df.groupby(df['timestamp'].dt.strftime('%Y-%m-%d')):
+            filename = os.path.join(directory, f'{category}_{day}.csv')
+            if os.path.exists(filename):
+                rows = pd.concat([conform(category, pd.read_csv(filename)), rows])
+                rows = rows.drop_duplicates('timestamp', keep='last').sort_values('timestamp')
+            rows.to_csv(filename, index=False)
+
+    def load_range(self, start: datetime, end: datetime,
+                   categories: Optional[List[str]] = None,
+                   columns: Optional[List[str]] = None,
+                   user_id: str = DEFAULT_USER) -> Dict[str, pd.DataFrame]:
+        directory = self._user_dir(user_id)
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        # Files are named after the collection day and may run past midnight,
+        # so the file for the day before ``start`` can hold rows in range too.
+        days = pd.date_range(start.normalize() - pd.Timedelta(days=1), end.normalize(), freq='D')
+
+        data = {}
+        for category in categories or CATEGORIES:
+            frames = []
+            for day in days:
+                filename = os.path.join(directory, f'{category}_{day:%Y-%m-%d}.csv')
+                if os.path.exists(filename):
+                    frames.append(pd.read_csv(filename))
+            if not frames:
+                continue
+            df = conform(category, pd.concat(frames, ignore_index=True))
+            df = df[(df['timestamp'] >= start) & (df['timestamp'] <= end)]
+            if df.empty:
+                continue
+            df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+            if columns is not None:
+                df = df[['timestamp'] + [col for col in df.columns if col in columns]]
+            data[category] = df
+        return data
+
+def migrate_csv_to_columnar(csv_dir: str, target: ColumnarStorage,
+                            user_id: str = DEFAULT_USER) -> Dict[str, int]:
+    """Copy every legacy daily CSV in ``csv_dir`` into ``target``.
+
+    Returns the number of rows migrated per category.
+    """
+    counts = {}
+    for category in CATEGORIES:
+        files = sorted(glob.glob(os.path.join(csv_dir, f'{category}_*.csv')))
+        if not files:
+            continue
+        df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+        target.write(category, df, user_id)
+        counts[category] = len(df)
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate daily CSV files into the columnar store.")
+    parser.add_argument('--source', default='data', help="directory holding <category>_<date>.csv files")
+    parser.add_argument('--target', default='data', help="root of the columnar store")
+    parser.add_argument('--user', default=DEFAULT_USER, help="user id to file the data under")
+    args = parser.parse_args()
+
+    counts = migrate_csv_to_columnar(args.source, ColumnarStorage(args.target), args.user)
+    for category, rows in counts.items():
+        print(f"{category}: {rows} rows")
+    print("Migration completed successfully!")
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from collect_data import DataCollector
+from data_store import DEFAULT_USER
+from train_model import MindsetModel, TARGET_COLUMNS, contiguous_windows, make_sequences
+
+def iter_chunks(collector: DataCollector, start: datetime, end: datetime,
+                chunk_size: timedelta = timedelta(days=7),
+                user_id: str = DEFAULT_USER) -> Iterator[Dict[str, pd.DataFrame]]:
+    """Yield aligned data between start and end, one chunk of time at a time."""
+    chunk_start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    while chunk_start <= end:
+        chunk_end = chunk_start + chunk_size
+        # load_range includes both ends, so stop just short of the next chunk
+        last = min(chunk_end - pd.Timedelta(1, 'ns'), end)
+        data = collector.load_range(chunk_start, last, user_id=user_id)
+        if 'mindset' in data and len(data['mindset']):
+            yield data
+        chunk_start = chunk_end
+
+def iter_window_chunks(model: MindsetModel, chunks: Iterator[Dict[str, pd.DataFrame]],
+                       split_time: datetime, subset: str = 'train'
+                       ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Build scaled (window, target) arrays chunk by chunk.
+
+    The last ``sequence_length`` rows of each chunk are carried into the
+    next one so windows span chunk boundaries; windows across gaps in the
+    data are dropped. A window belongs to the
+    ``'train'`` subset if its target timestamp is before ``split_time`` and
+    to ``'val'`` otherwise.
+    """
+    if subset not in ('train', 'val'):
+        raise ValueError("subset must be 'train' or 'val'")
+    split = np.datetime64(pd.Timestamp(split_time).as_unit('ns'))
+    length = model.sequence_length
+    carry_X = carry_y = carry_ts = None
+    for data in chunks:
+        X = model.scaler.transform(model.feature_matrix(data)).astype(np.float32)
+        y = data['mindset'][TARGET_COLUMNS].to_numpy(dtype=np.float32)
+        ts = data['mindset']['timestamp'].to_numpy(dtype='datetime64[ns]')
+        if carry_X is not None:
+            X = np.concatenate([carry_X, X])
+            y = np.concatenate([carry_y, y])
+            ts = np.concatenate([carry_ts, ts])
+        carry_X, carry_y, carry_ts = X[-length:], y[-length:], ts[-length:]
+
+        X_sequences, y_sequences = make_sequences(X, y, length)
+        target_ts = ts[length:]
+        mask = target_ts < split if subset == 'train' else target_ts >= split
+        # Windows across gaps in the data are left out
+        mask &= contiguous_windows(ts, length)
+        if mask.any():
+            yield X_sequences[mask], y_sequences[mask]
+
+def make_dataset(model: MindsetModel, collector: DataCollector, start: datetime, end: datetime,
+                 split_time: datetime, subset: str = 'train', batch_size: int = 32,
+                 shuffle_buffer: int = 10000, chunk_size: timedelta = timedelta(days=7),
+                 user_id: str = DEFAULT_USER):
+    """Create a streaming ``tf.data.Dataset`` of training or validation windows.
+
+    Data is read from the store one chunk at a time on every epoch, so only
+    the shuffle buffer and prefetched batches are held in memory. The model's
+    scaler must already be fitted.
+    """
+    import tensorflow as tf
+
+    if subset == 'val':
+        # Validation only needs enough history before the split for its first window
+        start = max(pd.Timestamp(start), pd.Timestamp(split_time) - chunk_size)
+    n_features = len(model.scaler.mean_)
+
+    def generate():
+        chunks = iter_chunks(collector, start, end, chunk_size, user_id)
+        yield from iter_window_chunks(model, chunks, split_time, subset)
+
+    dataset = tf.data.Dataset.from_generator(generate, output_signature=(
+        tf.TensorSpec((None, model.sequence_length, n_features), tf.float32),
+        tf.TensorSpec((None, len(TARGET_COLUMNS)), tf.float32),
+    )).unbatch()
+    if subset == 'train':
+        dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
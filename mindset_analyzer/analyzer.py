@@ -1,8 +1,76 @@
 import random
 from datetime import datetime, timedelta
+from .metrics_store import DEFAULT_USER
 
-def analyze_data(data, model=None):
-    """Analyze the collected data and return insights."""
+# Stored dashboard metric behind each analysed quantity
+ANALYSIS_METRICS = {
+    'mood': 'mindset_score',
+    'energy': 'energy_level',
+    'focus': 'focus_level',
+    'stress': 'stress_level'
+}
+
+def trend(values, tolerance=0.5):
+    """Describe the direction of a series from the slope of a least-squares line."""
+    if len(values) < 2:
+        return 'stable'
+    n = len(values)
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    slope = (sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+             / sum((x - mean_x) ** 2 for x in range(n)))
+    if slope > tolerance:
+        return 'increasing'
+    if slope < -tolerance:
+        return 'decreasing'
+    return 'stable'
+
+def rollup_analysis(store, user_id=DEFAULT_USER, now=None):
+    """Build the pattern, trend and statistics blocks from precomputed rollups.
+
+    Reads at most a few dozen daily, weekly and monthly rollup rows instead
+    of the underlying hourly samples.
+    """
+    now = now or datetime.utcnow()
+    metrics = list(ANALYSIS_METRICS.values())
+    days = store.rollup_series(user_id, 'dashboard', 'day', now - timedelta(days=7), now, metrics)
+    weeks = store.rollup_series(user_id, 'dashboard', 'week', now - timedelta(weeks=8), now, metrics)
+    months = store.rollup_series(user_id, 'dashboard', 'month', now - timedelta(days=365), now, metrics)
+    month_days = store.rollup_series(user_id, 'dashboard', 'day', now - timedelta(days=30), now, metrics)
+    summary = store.summary(user_id, 'dashboard', now - timedelta(days=30), now, metrics)
+    
+    def means(series, metric):
+        return [round(entry[metric]['mean'], 1) if metric in entry else None for entry in series]
+    
+    daily_patterns = {'labels': [entry['bucket'] for entry in days]}
+    daily_patterns.update((name, means(days, metric)) for name, metric in ANALYSIS_METRICS.items())
+    
+    statistics = {}
+    for name, metric in ANALYSIS_METRICS.items():
+        if metric in summary:
+            statistics[f'mean_{name}'] = summary[metric]['mean']
+            statistics[f'{name}_trend'] = trend([v for v in means(month_days, metric) if v is not None])
+    
+    return {
+        'daily_patterns': daily_patterns,
+        'weekly_trends': {
+            'labels': [entry['bucket'] for entry in weeks],
+            'mood_scores': means(weeks, ANALYSIS_METRICS['mood']),
+            'energy_levels': means(weeks, ANALYSIS_METRICS['energy'])
+        },
+        'monthly_comparison': {
+            'labels': [entry['bucket'][:7] for entry in months],
+            'scores': means(months, ANALYSIS_METRICS['mood'])
+        },
+        'statistics': statistics
+    }
+
+def analyze_data(data, model=None, store=None, user_id=DEFAULT_USER):
+    """Analyze the collected data and return insights.
+
+    With a metrics ``store`` holding data for the user, the patterns, trends
+    and statistics come from its rollups.
+    """
     # This is a placeholder that generates sample analysis
     # In a real application, this would perform actual data analysis
     
@@ -10,7 +78,7 @@ def analyze_data(data, model=None):
     dates = [(datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
     dates.reverse()
     
-    return {
+    analysis = {
         'mood_score': random.randint(60, 95),
         'energy_level': random.randint(50, 90),
         'focus_level': random.randint(40, 85),
@@ -66,4 +134,7 @@ def analyze_data(data, model=None):
             'Consider adding 2 more exercise sessions per week',
             'Take regular breaks during work hours'
         ]
-    } 
\ No newline at end of file
+    }
+    if store is not None and store.has_data(user_id):
+        analysis.update(rollup_analysis(store, user_id))
+    return analysis
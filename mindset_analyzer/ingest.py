@@ -0,0 +1,150 @@
+"""
+Parsing, validation and deduplication of uploaded sample batches.
+"""
+
+import io
+import re
+from datetime import datetime
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+
+from .metrics_store import MetricsStore, to_epoch
+
+CATEGORIES = ('dashboard', 'spiritual', 'energy', 'travel', 'creative', 'learning')
+
+METRIC_NAME = re.compile(r'^[a-z][a-z0-9_]{0,63}$')
+
+# Samples further ahead than this are taken to come from a bad device clock
+MAX_CLOCK_SKEW = 24 * 3600
+
+class Batch(NamedTuple):
+    """Samples in long format: one entry per (category, timestamp, metric)."""
+    categories: np.ndarray
+    timestamps: np.ndarray
+    metrics: np.ndarray
+    values: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.values)
+
+    def rows(self, user_id: str):
+        """Yield rows for ``MetricsStore.insert_many``."""
+        return zip([user_id] * self.size, self.categories.tolist(), self.timestamps.tolist(),
+                   self.metrics.tolist(), self.values.tolist())
+
+def columns_to_batch(categories, timestamps, columns: Dict[str, np.ndarray]) -> Batch:
+    """Turn per-sample columns (NaN for a missing value) into a long batch."""
+    n = len(timestamps)
+    categories = np.broadcast_to(np.asarray(categories, dtype=str), (n,))
+    for metric, column in columns.items():
+        if not METRIC_NAME.match(metric):
+            raise ValueError(f"Invalid metric name: {metric!r}")
+        if column.shape != (n,):
+            raise ValueError(f"Metric {metric!r} has shape {column.shape} for {n} timestamps")
+    if not columns:
+        return Batch(np.array([], dtype=str), np.array([], dtype=np.int64),
+                     np.array([], dtype=str), np.array([], dtype=float))
+    masks = [~np.isnan(column) for column in columns.values()]
+    return Batch(
+        categories=np.concatenate([categories[mask] for mask in masks]),
+        timestamps=np.concatenate([timestamps[mask] for mask in masks]),
+        metrics=np.concatenate([np.full(mask.sum(), metric) for metric, mask in zip(columns, masks)]),
+        values=np.concatenate([column[mask] for column, mask in zip(columns.values(), masks)]))
+
+def parse_json(payload: Dict) -> Batch:
+    """Parse ``{"samples": [{"category", "timestamp", "metrics": {...}}, ...]}``.
+
+    Timestamps are ISO strings or epoch seconds.
+    """
+    samples = payload.get('samples')
+    if not isinstance(samples, list):
+        raise ValueError("Request must include a 'samples' list")
+    try:
+        categories = np.array([sample.get('category', 'dashboard') for sample in samples], dtype=str)
+        timestamps = np.array([to_epoch(datetime.fromisoformat(sample['timestamp'])
+                                        if isinstance(sample['timestamp'], str) else sample['timestamp'])
+                               for sample in samples], dtype=np.int64)
+        metrics = sorted({metric for sample in samples for metric in sample['metrics']})
+        columns = {metric: np.array([sample['metrics'].get(metric, np.nan) for sample in samples],
+                                    dtype=float)
+                   for metric in metrics}
+    except (AttributeError, KeyError, OverflowError, TypeError) as e:
+        raise ValueError(f"Malformed sample: {e}") from None
+    return columns_to_batch(categories, timestamps, columns)
+
+def parse_npz(data: bytes) -> Batch:
+    """Parse a NumPy ``.npz`` archive of columns.
+
+    ``timestamp`` holds epoch seconds (or datetime64 values), ``category``
+    one category name per sample or a single one for all, and every other
+    array is a metric with NaN for missing values.
+    """
+    try:
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            arrays = {name: archive[name] for name in archive.files}
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Invalid npz archive: {e}") from None
+    if 'timestamp' not in arrays:
+        raise ValueError("Archive must include a 'timestamp' array")
+    timestamps = arrays.pop('timestamp')
+    if np.issubdtype(timestamps.dtype, np.datetime64):
+        timestamps = timestamps.astype('datetime64[s]').astype(np.int64)
+    elif not np.issubdtype(timestamps.dtype, np.number) or not np.isfinite(timestamps).all():
+        raise ValueError("'timestamp' must hold epoch seconds or datetime64 values")
+    categories = arrays.pop('category', np.array('dashboard'))
+    if categories.dtype.kind != 'U':
+        raise ValueError("'category' must hold strings")
+    try:
+        columns = {metric: column.astype(float) for metric, column in arrays.items()}
+    except ValueError as e:
+        raise ValueError(f"Metric arrays must be numeric: {e}") from None
+    return columns_to_batch(categories, timestamps.astype(np.int64).ravel(), columns)
+
+def validate(batch: Batch, now: int = None):
+    """Split a batch into valid rows and the number of rejected ones.
+
+    Rows are rejected for an unknown category, a non-finite value, or a
+    timestamp before 2000 or too far in the future.
+    """
+    now = to_epoch(datetime.utcnow()) if now is None else now
+    valid = (np.isin(batch.categories, CATEGORIES)
+             & np.isfinite(batch.values)
+             & (batch.timestamps >= 946684800)
+             & (batch.timestamps <= now + MAX_CLOCK_SKEW))
+    return Batch(*(column[valid] for column in batch)), int((~valid).sum())
+
+def deduplicate(batch: Batch):
+    """Keep the last value sent for each (category, timestamp, metric).
+
+    Returns the deduplicated batch and the number of rows dropped.
+    """
+    if batch.size == 0:
+        return batch, 0
+    _, category_codes = np.unique(batch.categories, return_inverse=True)
+    _, metric_codes = np.unique(batch.metrics, return_inverse=True)
+    # Stable sort by key; the last row of each run of equal keys was sent last
+    order = np.lexsort((np.arange(batch.size), metric_codes, batch.timestamps, category_codes))
+    keys = np.stack([category_codes[order], batch.timestamps[order], metric_codes[order]])
+    last = np.ones(batch.size, dtype=bool)
+    last[:-1] = (keys[:, 1:] != keys[:, :-1]).any(axis=0)
+    keep = order[last]
+    return Batch(*(column[keep] for column in batch)), batch.size - len(keep)
+
+def prepare(batch: Batch) -> Tuple[Batch, Dict[str, int]]:
+    """Validate and deduplicate a batch, counting what was dropped."""
+    received = batch.size
+    batch, rejected = validate(batch)
+    batch, duplicates = deduplicate(batch)
+    return batch, {
+        'received': received,
+        'rejected': rejected,
+        'duplicates': duplicates
+    }
+
+def ingest(store: MetricsStore, user_id: str, batch: Batch) -> Dict[str, int]:
+    """Validate, deduplicate and write a batch in a single transaction."""
+    batch, counts = prepare(batch)
+    counts['written'] = store.insert_many(batch.rows(user_id)) if batch.size else 0
+    return counts
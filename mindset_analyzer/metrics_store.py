@@ -0,0 +1,412 @@
+"""
+SQLite storage for hourly mindset metrics.
+"""
+
+import itertools
+import math
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_USER = 'default'
+
+DAY = 86400
+
+# Metrics are stored in long format, one row per (user, category, time,
+# metric). The primary key doubles as the composite (user_id, category,
+# timestamp) index, and WITHOUT ROWID clusters rows by it so a time-range
+# query for one user and category is a single contiguous b-tree scan.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (user_id, category, timestamp, metric)
+) WITHOUT ROWID;
+"""
+
+# Rollups keep count, sum, sum of squares, min and max per metric for each
+# day, ISO week (starting Monday) and calendar month, all in UTC. They are
+# updated in the same transaction as the raw rows, so analytics can read
+# O(periods) rows instead of scanning hourly data.
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    sum_sq REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (user_id, category, period, bucket, metric)
+) WITHOUT ROWID;
+"""
+
+# Start of the bucket holding ``timestamp`` for each rollup period. The
+# epoch fell on a Thursday, so weeks are shifted by three days to start on
+# Monday.
+PERIODS = {
+    'day': f'timestamp - timestamp % {DAY}',
+    'week': f'timestamp - (timestamp + {3 * DAY}) % {7 * DAY}',
+    'month': "CAST(strftime('%s', timestamp, 'unixepoch', 'start of month') AS INTEGER)",
+}
+
+STAGING_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS staging (
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (user_id, category, timestamp, metric)
+) WITHOUT ROWID;
+CREATE TEMP TABLE IF NOT EXISTS replaced (
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    metric TEXT NOT NULL
+);
+"""
+
+Row = Tuple[str, str, int, str, float]
+
+_memory_ids = itertools.count()
+
+def to_epoch(value) -> int:
+    """Convert a datetime (naive values are taken as UTC) or number to epoch seconds."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+def from_epoch(seconds: int) -> datetime:
+    """Convert epoch seconds to a naive UTC datetime."""
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+class MetricsStore:
+    """Hourly metrics in SQLite behind a small pool of connections.
+
+    Up to ``pool_size`` idle connections are kept, each opened once with its
+    pragmas and staging tables, and handed to one caller at a time. When all
+    of them are in use an extra connection is opened and closed on release,
+    so callers never wait on each other (a request can hold two cursors).
+    """
+
+    def __init__(self, path: str, pool_size: int = 8):
+        if path == ':memory:':
+            # A named shared-cache database lets every pooled connection see
+            # the same in-memory data; the keeper connection keeps it alive.
+            self._uri = f'file:mindset_metrics_{next(_memory_ids)}?mode=memory&cache=shared'
+            self._keeper = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._uri = f'file:{path}'
+            self._keeper = None
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._listeners = []
+        with self.connection() as conn:
+            conn.executescript(SCHEMA + ROLLUP_SCHEMA)
+            rebuild = (conn.execute('SELECT 1 FROM rollups LIMIT 1').fetchone() is None
+                       and conn.execute('SELECT 1 FROM metrics LIMIT 1').fetchone() is not None)
+        if rebuild:
+            # Database written before rollups existed
+            self.rebuild_rollups()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Pooled connections move between threads, one user at a time
+        conn = sqlite3.connect(self._uri, uri=True, timeout=30, check_same_thread=False)
+        if self._keeper is None:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.executescript(STAGING_SCHEMA)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a ``with`` block."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _fetch(self, sql: str, params) -> List[tuple]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def insert_many(self, rows: Iterable[Row]) -> int:
+        """Insert (user_id, category, timestamp, metric, value) rows in one transaction.
+
+        A row for an existing (user, category, timestamp, metric) replaces it.
+        Rollups are updated incrementally in the same transaction. Returns the
+        number of rows that were new or changed.
+        """
+        with self.connection() as conn, conn:
+            conn.execute('DELETE FROM staging')
+            conn.execute('DELETE FROM replaced')
+            conn.executemany(
+                'INSERT OR REPLACE INTO staging VALUES (?, ?, ?, ?, ?)',
+                ((user_id, category, to_epoch(ts), metric, float(value))
+                 for user_id, category, ts, metric, value in rows))
+
+            # Resent rows that match what is stored change nothing
+            conn.execute("""
+                DELETE FROM staging WHERE EXISTS (
+                    SELECT 1 FROM metrics m WHERE m.user_id = staging.user_id
+                    AND m.category = staging.category AND m.timestamp = staging.timestamp
+                    AND m.metric = staging.metric AND m.value = staging.value)""")
+            conn.execute("""
+                INSERT INTO replaced
+                SELECT user_id, category, timestamp, metric FROM staging s WHERE EXISTS (
+                    SELECT 1 FROM metrics m WHERE m.user_id = s.user_id
+                    AND m.category = s.category AND m.timestamp = s.timestamp
+                    AND m.metric = s.metric)""")
+
+            # New rows are folded into the rollups before they are stored
+            for period, bucket in PERIODS.items():
+                conn.execute(f"""
+                    INSERT INTO rollups
+                    SELECT user_id, category, '{period}', {bucket} AS bucket, metric,
+                           COUNT(*), SUM(value), SUM(value * value), MIN(value), MAX(value)
+                    FROM staging s WHERE NOT EXISTS (
+                        SELECT 1 FROM replaced r WHERE r.user_id = s.user_id
+                        AND r.category = s.category AND r.timestamp = s.timestamp
+                        AND r.metric = s.metric)
+                    GROUP BY user_id, category, bucket, metric
+                    ON CONFLICT (user_id, category, period, bucket, metric) DO UPDATE SET
+                        count = count + excluded.count,
+                        sum = sum + excluded.sum,
+                        sum_sq = sum_sq + excluded.sum_sq,
+                        min = MIN(min, excluded.min),
+                        max = MAX(max, excluded.max)""")
+            conn.execute('INSERT OR REPLACE INTO metrics SELECT * FROM staging')
+
+            # Replaced values can invalidate min and max, so their buckets are
+            # recomputed from the raw rows
+            for period, bucket in PERIODS.items():
+                conn.execute(f"""
+                    INSERT OR REPLACE INTO rollups
+                    SELECT user_id, category, '{period}', bucket, metric,
+                           COUNT(*), SUM(value), SUM(value * value), MIN(value), MAX(value)
+                    FROM (
+                        SELECT user_id, category, metric, value, {bucket} AS bucket FROM metrics
+                        WHERE (user_id, category, metric) IN (
+                            SELECT user_id, category, metric FROM replaced)
+                        AND timestamp BETWEEN (SELECT MIN(timestamp) - {31 * DAY} FROM replaced)
+                                          AND (SELECT MAX(timestamp) + {31 * DAY} FROM replaced))
+                    WHERE (user_id, category, metric, bucket) IN (
+                        SELECT user_id, category, metric, {bucket} FROM replaced)
+                    GROUP BY user_id, category, bucket, metric""")
+            changed = conn.execute('SELECT COUNT(*) FROM staging').fetchone()[0]
+            users = [user for user, in conn.execute('SELECT DISTINCT user_id FROM staging')]
+        if users:
+            for listener in self._listeners:
+                listener(users)
+        return changed
+
+    def add_listener(self, callback: Callable[[List[str]], None]):
+        """Call ``callback(user_ids)`` after every insert that changed those users' data."""
+        self._listeners.append(callback)
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from the raw metrics."""
+        with self.connection() as conn, conn:
+            conn.execute('DELETE FROM rollups')
+            for period, bucket in PERIODS.items():
+                conn.execute(f"""
+                    INSERT INTO rollups
+                    SELECT user_id, category, '{period}', {bucket} AS bucket, metric,
+                           COUNT(*), SUM(value), SUM(value * value), MIN(value), MAX(value)
+                    FROM metrics GROUP BY user_id, category, bucket, metric""")
+
+    def insert_points(self, user_id: str, category: str, timestamps: Sequence,
+                      values: Dict[str, Sequence[float]]) -> int:
+        """Insert column-oriented samples: one list of values per metric."""
+        return self.insert_many(
+            (user_id, category, ts, metric, value)
+            for metric, column in values.items()
+            for ts, value in zip(timestamps, column))
+
+    def latest(self, user_id: str, category: str) -> Dict:
+        """Get the most recent sample of every metric in a category."""
+        with self.connection() as conn:
+            row = conn.execute(
+                'SELECT MAX(timestamp) FROM metrics WHERE user_id = ? AND category = ?',
+                (user_id, category)).fetchone()
+            if row[0] is None:
+                return {}
+            sample = dict(conn.execute(
+                'SELECT metric, value FROM metrics WHERE user_id = ? AND category = ? AND timestamp = ?',
+                (user_id, category, row[0])))
+        sample['timestamp'] = from_epoch(row[0]).isoformat()
+        return sample
+
+    def query_range(self, user_id: str, category: str, start, end,
+                    metrics: Optional[List[str]] = None) -> List[Dict]:
+        """Get samples with start <= timestamp <= end, one dict per timestamp."""
+        sql = ('SELECT timestamp, metric, value FROM metrics '
+               'WHERE user_id = ? AND category = ? AND timestamp BETWEEN ? AND ?')
+        params = [user_id, category, to_epoch(start), to_epoch(end)]
+        if metrics:
+            sql += f" AND metric IN ({', '.join('?' * len(metrics))})"
+            params.extend(metrics)
+        return self._samples(self._fetch(sql + ' ORDER BY timestamp', params))
+
+    def latest_samples(self, user_id: str, category: str, n: int) -> List[Dict]:
+        """Get the last ``n`` samples, oldest first, in the format of ``query_range``."""
+        return self._samples(self._fetch(
+            'SELECT timestamp, metric, value FROM metrics WHERE user_id = ? AND category = ? '
+            'AND timestamp IN (SELECT DISTINCT timestamp FROM metrics WHERE user_id = ? AND category = ? '
+            'ORDER BY timestamp DESC LIMIT ?) ORDER BY timestamp',
+            (user_id, category, user_id, category, n)))
+
+    @staticmethod
+    def _samples(rows: Iterable[tuple]) -> List[Dict]:
+        """Group (timestamp, metric, value) rows sorted by time into one dict per timestamp."""
+        samples = []
+        for ts, group in itertools.groupby(rows, key=lambda row: row[0]):
+            sample = {'timestamp': from_epoch(ts).isoformat()}
+            sample.update((metric, value) for _, metric, value in group)
+            samples.append(sample)
+        return samples
+
+    def iter_buckets(self, user_id: str, category: str, start, end, width: int,
+                     metrics: Optional[List[str]] = None, descending: bool = False) -> Iterator[Dict]:
+        """Lazily yield the mean of each metric over ``width``-second buckets.
+
+        Buckets are aligned to the epoch, so their boundaries do not depend on
+        the range asked for. Each dict holds ``timestamp`` (the bucket start as
+        ISO) and the metric means; rows are read from the cursor as the caller
+        iterates.
+        """
+        width = int(width)
+        sql = (f'SELECT timestamp - timestamp % {width} AS bucket, metric, AVG(value) FROM metrics '
+               'WHERE user_id = ? AND category = ? AND timestamp BETWEEN ? AND ?')
+        params = [user_id, category, to_epoch(start), to_epoch(end)]
+        if metrics:
+            sql += f" AND metric IN ({', '.join('?' * len(metrics))})"
+            params.extend(metrics)
+        sql += f" GROUP BY bucket, metric ORDER BY bucket {'DESC' if descending else 'ASC'}"
+        # The connection is held until the caller finishes or closes the iterator
+        with self.connection() as conn:
+            for bucket, group in itertools.groupby(conn.execute(sql, params), key=lambda row: row[0]):
+                entry = {'timestamp': from_epoch(bucket).isoformat()}
+                entry.update((metric, value) for _, metric, value in group)
+                yield entry
+
+    def iter_rows(self, user_id: str, start=None, end=None, categories: Optional[List[str]] = None,
+                  batch_size: int = 1000) -> Iterator[Tuple[str, int, str, float]]:
+        """Lazily yield (category, timestamp, metric, value) rows of one user.
+
+        Rows come in primary key order and are fetched ``batch_size`` at a
+        time, so memory use does not grow with the size of the export.
+        """
+        sql = 'SELECT category, timestamp, metric, value FROM metrics WHERE user_id = ?'
+        params = [user_id]
+        if start is not None:
+            sql += ' AND timestamp >= ?'
+            params.append(to_epoch(start))
+        if end is not None:
+            sql += ' AND timestamp <= ?'
+            params.append(to_epoch(end))
+        if categories:
+            sql += f" AND category IN ({', '.join('?' * len(categories))})"
+            params.extend(categories)
+        with self.connection() as conn:
+            cursor = conn.execute(sql + ' ORDER BY category, timestamp, metric', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+
+    def rollup_series(self, user_id: str, category: str, period: str, start, end,
+                      metrics: Optional[List[str]] = None) -> List[Dict]:
+        """Get per-period statistics for buckets starting between start and end.
+
+        Returns one dict per bucket with ``bucket`` (its start as an ISO date)
+        and, per metric, a dict of count, mean, std, min and max.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown rollup period: {period}")
+        sql = ('SELECT bucket, metric, count, sum, sum_sq, min, max FROM rollups '
+               'WHERE user_id = ? AND category = ? AND period = ? AND bucket BETWEEN ? AND ?')
+        params = [user_id, category, period, to_epoch(start), to_epoch(end)]
+        if metrics:
+            sql += f" AND metric IN ({', '.join('?' * len(metrics))})"
+            params.extend(metrics)
+        series = []
+        for bucket, group in itertools.groupby(self._fetch(sql + ' ORDER BY bucket', params),
+                                               key=lambda row: row[0]):
+            entry = {'bucket': from_epoch(bucket).strftime('%Y-%m-%d')}
+            for _, metric, count, total, total_sq, low, high in group:
+                entry[metric] = rollup_stats(count, total, total_sq, low, high)
+            series.append(entry)
+        return series
+
+    def daily_means(self, user_id: str, category: str, start, end,
+                    metrics: Optional[List[str]] = None) -> List[Dict]:
+        """Get the mean of each metric per UTC day, one dict per day with data."""
+        day_start = to_epoch(start) - to_epoch(start) % DAY
+        days = []
+        for entry in self.rollup_series(user_id, category, 'day', day_start, end, metrics):
+            summary = {'date': entry.pop('bucket')}
+            summary.update((metric, stats['mean']) for metric, stats in entry.items())
+            days.append(summary)
+        return days
+
+    def summary(self, user_id: str, category: str, start, end,
+                metrics: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Combine the daily rollups of whole days in a range into overall statistics."""
+        day_start = to_epoch(start) - to_epoch(start) % DAY
+        sql = ('SELECT metric, SUM(count), SUM(sum), SUM(sum_sq), MIN(min), MAX(max) FROM rollups '
+               "WHERE user_id = ? AND category = ? AND period = 'day' AND bucket BETWEEN ? AND ?")
+        params = [user_id, category, day_start, to_epoch(end)]
+        if metrics:
+            sql += f" AND metric IN ({', '.join('?' * len(metrics))})"
+            params.extend(metrics)
+        return {row[0]: rollup_stats(*row[1:])
+                for row in self._fetch(sql + ' GROUP BY metric', params)}
+
+    def has_data(self, user_id: str) -> bool:
+        """Check whether any metrics are stored for a user."""
+        return bool(self._fetch('SELECT 1 FROM metrics WHERE user_id = ? LIMIT 1', (user_id,)))
+
+def rollup_stats(count: int, total: float, total_sq: float, low: float, high: float) -> Dict:
+    """Turn rollup sums into count, mean, sample standard deviation, min and max."""
+    mean = total / count
+    variance = (total_sq - total * mean) / (count - 1) if count > 1 else 0.0
+    return {
+        'count': count,
+        'mean': mean,
+        'std': math.sqrt(max(variance, 0.0)),
+        'min': low,
+        'max': high
+    }
+
+def init_app(app) -> MetricsStore:
+    """Open the metrics store at ``DATABASE_PATH`` for a Flask app."""
+    store = MetricsStore(app.config['DATABASE_PATH'], app.config.get('DATABASE_POOL_SIZE', 8))
+    app.extensions['metrics_store'] = store
+    return store
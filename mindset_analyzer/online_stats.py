@@ -0,0 +1,314 @@
+"""
+Online statistics that update in O(1) per observation and merge across shards.
+"""
+
+import copy
+import math
+from collections import deque
+
+import numpy as np
+
+class RunningStats:
+    """Count, mean, variance (Welford), min and max of a stream."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x: float):
+        """Add one observation."""
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def update_batch(self, values):
+        """Add many observations with one vectorized pass."""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: 'RunningStats'):
+        """Combine with statistics of another partition (Chan et al.)."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, matching ``pandas.Series.var``."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+class EWMA:
+    """Exponentially weighted moving average, matching ``Series.ewm(alpha=...).mean()``.
+
+    The weighted sum and total weight are kept separately, so an EWMA of a
+    later partition can be merged onto an earlier one.
+    """
+
+    def __init__(self, alpha: float = 0.1):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.count = 0
+        self.weighted_sum = 0.0
+        self.weight = 0.0
+
+    def update(self, x: float):
+        decay = 1 - self.alpha
+        self.weighted_sum = self.weighted_sum * decay + x
+        self.weight = self.weight * decay + 1
+        self.count += 1
+
+    def update_batch(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        decay = 1 - self.alpha
+        weights = decay ** np.arange(len(values) - 1, -1, -1)
+        self.weighted_sum = self.weighted_sum * decay ** len(values) + float(weights @ values)
+        self.weight = self.weight * decay ** len(values) + float(weights.sum())
+        self.count += len(values)
+
+    def merge(self, later: 'EWMA'):
+        """Append a partition that follows this one in time."""
+        if later.alpha != self.alpha:
+            raise ValueError("Cannot merge EWMAs with different alpha")
+        decay = (1 - self.alpha) ** later.count
+        self.weighted_sum = self.weighted_sum * decay + later.weighted_sum
+        self.weight = self.weight * decay + later.weight
+        self.count += later.count
+
+    @property
+    def value(self) -> float:
+        return self.weighted_sum / self.weight if self.weight else math.nan
+
+class RollingMinMax:
+    """Minimum and maximum of the last ``window`` observations (monotonic deques)."""
+
+    def __init__(self, window: int = 24):
+        self.window = window
+        self.count = 0
+        self._mins = deque()
+        self._maxs = deque()
+
+    def update(self, x: float):
+        """Add one observation in amortised O(1)."""
+        index = self.count
+        self.count += 1
+        while self._mins and self._mins[-1][1] >= x:
+            self._mins.pop()
+        self._mins.append((index, x))
+        while self._maxs and self._maxs[-1][1] <= x:
+            self._maxs.pop()
+        self._maxs.append((index, x))
+        oldest = self.count - self.window
+        if self._mins[0][0] < oldest:
+            self._mins.popleft()
+        if self._maxs[0][0] < oldest:
+            self._maxs.popleft()
+
+    def update_batch(self, values):
+        # Only the last ``window`` values can still be in the window
+        values = np.asarray(values, dtype=float)
+        skipped = max(len(values) - self.window, 0)
+        if skipped:
+            self._mins.clear()
+            self._maxs.clear()
+            self.count += skipped
+        for x in values[skipped:]:
+            self.update(float(x))
+
+    def merge(self, later: 'RollingMinMax'):
+        """Append a partition that follows this one in time."""
+        offset = self.count
+        for queue, others, dominated in ((self._mins, later._mins, lambda last, x: last >= x),
+                                         (self._maxs, later._maxs, lambda last, x: last <= x)):
+            for index, x in others:
+                while queue and dominated(queue[-1][1], x):
+                    queue.pop()
+                queue.append((index + offset, x))
+        self.count += later.count
+        oldest = self.count - self.window
+        for queue in (self._mins, self._maxs):
+            while queue and queue[0][0] < oldest:
+                queue.popleft()
+
+    @property
+    def min(self) -> float:
+        return self._mins[0][1] if self._mins else math.nan
+
+    @property
+    def max(self) -> float:
+        return self._maxs[0][1] if self._maxs else math.nan
+
+class TrendSlope:
+    """Least-squares slope of y against x, updated with co-moments.
+
+    ``x`` defaults to the observation number; pass absolute positions (e.g.
+    hours since the epoch) when partitions are merged.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.c_xy = 0.0
+
+    def update(self, y: float, x: float = None):
+        x = float(self.count) if x is None else x
+        self.count += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.count
+        self.mean_y += (y - self.mean_y) / self.count
+        self.m2_x += dx * (x - self.mean_x)
+        self.c_xy += dx * (y - self.mean_y)
+
+    def update_batch(self, values, x=None):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        if x is None:
+            x = np.arange(self.count, self.count + len(values), dtype=float)
+        x = np.asarray(x, dtype=float)
+        batch = TrendSlope()
+        batch.count = len(values)
+        batch.mean_x = float(x.mean())
+        batch.mean_y = float(values.mean())
+        batch.m2_x = float(((x - batch.mean_x) ** 2).sum())
+        batch.c_xy = float(((x - batch.mean_x) * (values - batch.mean_y)).sum())
+        self.merge(batch)
+
+    def merge(self, other: 'TrendSlope'):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.count * other.count / count
+        self.m2_x += other.m2_x + dx * dx * weight
+        self.c_xy += other.c_xy + dx * dy * weight
+        self.mean_x += dx * other.count / count
+        self.mean_y += dy * other.count / count
+        self.count = count
+
+    @property
+    def slope(self) -> float:
+        return self.c_xy / self.m2_x if self.m2_x > 0 else math.nan
+
+class MetricSummary:
+    """All streaming statistics kept for one metric."""
+
+    def __init__(self, alpha: float = 0.1, window: int = 24):
+        self.stats = RunningStats()
+        self.ewma = EWMA(alpha)
+        self.rolling = RollingMinMax(window)
+        self.trend = TrendSlope()
+
+    def update(self, x: float):
+        """Add one observation in O(1)."""
+        self.stats.update(x)
+        self.ewma.update(x)
+        self.rolling.update(x)
+        self.trend.update(x)
+
+    def update_batch(self, values):
+        """Add many observations, vectorized where the statistic allows."""
+        values = np.asarray(values, dtype=float)
+        self.trend.update_batch(values)
+        self.stats.update_batch(values)
+        self.ewma.update_batch(values)
+        self.rolling.update_batch(values)
+
+    def merge(self, later: 'MetricSummary'):
+        """Append the summary of a partition that follows this one in time."""
+        # The later partition numbered its observations from zero
+        trend = copy.copy(later.trend)
+        trend.mean_x += self.stats.count
+        self.trend.merge(trend)
+        self.stats.merge(later.stats)
+        self.ewma.merge(later.ewma)
+        self.rolling.merge(later.rolling)
+
+class CorrelationAccumulator:
+    """Mean vector and co-moment matrix of a stream of observation rows.
+
+    Blocks of rows are added in one vectorized pass and accumulators from
+    different partitions merge exactly, so a correlation matrix can be
+    maintained as data arrives or computed in parallel shards.
+    """
+
+    def __init__(self, n_columns: int):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.comoment = np.zeros((n_columns, n_columns))
+
+    def update(self, block):
+        """Add a (rows, columns) block of observations."""
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if len(block) == 0:
+            return
+        batch = CorrelationAccumulator(block.shape[1])
+        batch.count = len(block)
+        batch.mean = block.mean(axis=0)
+        centered = block - batch.mean
+        batch.comoment = centered.T @ centered
+        self.merge(batch)
+
+    def merge(self, other: 'CorrelationAccumulator'):
+        """Combine with the accumulator of another partition."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.count * other.count / count
+        self.mean = self.mean + delta * other.count / count
+        self.count = count
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance matrix."""
+        return self.comoment / (self.count - 1) if self.count > 1 else np.full_like(self.comoment, np.nan)
+
+    def correlation(self) -> np.ndarray:
+        """Pearson correlation matrix; constant columns give NaN."""
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.comoment / np.outer(std, std)
+
+def lagged_correlation(features, targets, lag: int) -> np.ndarray:
+    """Correlate each feature at time t with each target at time t + lag.
+
+    Returns a (features, targets) matrix.
+    """
+    features = np.asarray(features, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    if lag < 0:
+        raise ValueError("lag must be >= 0")
+    n = min(len(features), len(targets)) - lag
+    accumulator = CorrelationAccumulator(features.shape[1] + targets.shape[1])
+    if n > 0:
+        accumulator.update(np.hstack([features[:n], targets[lag:lag + n]]))
+    return accumulator.correlation()[:features.shape[1], features.shape[1]:]
@@ -0,0 +1,206 @@
+"""
+Compact in-memory history of each user's most recent metrics.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics_store import from_epoch, to_epoch
+
+class MetricsRecord:
+    """One user's metrics at one time."""
+    __slots__ = ('user_id', 'timestamp', 'values')
+
+    def __init__(self, user_id: str, timestamp: int, values: Dict[str, float]):
+        self.user_id = user_id
+        self.timestamp = timestamp
+        self.values = values
+
+    def to_dict(self) -> Dict:
+        """Metrics plus the ISO timestamp, as the dashboard API returns them."""
+        return {**self.values, 'timestamp': from_epoch(self.timestamp).isoformat()}
+
+class RecentMetrics:
+    """Fixed-size ring buffers of recent samples for many users.
+
+    All users share three NumPy arrays: values (users, history, metrics)
+    with NaN for a missing metric, timestamps (users, history) and a sample
+    count per user. A dict maps each user to a row ("slot"), so appending is
+    O(metrics) and reading the latest samples of many users is a single
+    fancy-indexing operation. Capacity doubles when every slot is taken.
+
+    Values are kept as float64 so they read back exactly as stored.
+    ``invalidate_users`` drops users whose stored data changed; pass the
+    ``generation`` read before querying the store to ``append`` so a sample
+    loaded while a write was committing is not kept.
+    """
+
+    def __init__(self, metrics: Sequence[str], history: int = 24, capacity: int = 1024):
+        self.metrics = list(metrics)
+        self.history = history
+        self._index = {metric: i for i, metric in enumerate(self.metrics)}
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._generations: Dict[str, int] = {}
+        self._values = np.full((capacity, history, len(self.metrics)), np.nan)
+        self._timestamps = np.zeros((capacity, history), dtype=np.int64)
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._slots
+
+    @property
+    def nbytes(self) -> int:
+        return self._values.nbytes + self._timestamps.nbytes + self._counts.nbytes
+
+    def _slot(self, user_id: str) -> int:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self._slots)
+                if slot == len(self._counts):
+                    self._grow()
+            self._slots[user_id] = slot
+        return slot
+
+    def _grow(self):
+        capacity = 2 * len(self._counts)
+        values = np.full((capacity,) + self._values.shape[1:], np.nan)
+        values[:len(self._values)] = self._values
+        timestamps = np.zeros((capacity, self.history), dtype=np.int64)
+        timestamps[:len(self._timestamps)] = self._timestamps
+        counts = np.zeros(capacity, dtype=np.int64)
+        counts[:len(self._counts)] = self._counts
+        self._values, self._timestamps, self._counts = values, timestamps, counts
+
+    def _row(self, values) -> np.ndarray:
+        if isinstance(values, dict):
+            row = np.full(len(self.metrics), np.nan)
+            for metric, value in values.items():
+                i = self._index.get(metric)
+                if i is not None:
+                    row[i] = value
+            return row
+        return np.asarray(values, dtype=np.float64)
+
+    def generation(self, user_id: str) -> int:
+        """Number of times the user has been invalidated."""
+        return self._generations.get(user_id, 0)
+
+    def append(self, user_id: str, timestamp, values, generation: int = None):
+        """Add a sample, given as a dict by metric name or a row in ``metrics`` order.
+
+        If ``generation`` is given and the user was invalidated since, the
+        sample may be stale and is not added.
+        """
+        row = self._row(values)
+        with self._lock:
+            if generation is not None and generation != self.generation(user_id):
+                return
+            slot = self._slot(user_id)
+            position = self._counts[slot] % self.history
+            self._values[slot, position] = row
+            self._timestamps[slot, position] = to_epoch(timestamp)
+            self._counts[slot] += 1
+
+    def extend(self, user_id: str, timestamps: np.ndarray, values, generation: int = None):
+        """Add samples in time order: epoch seconds and a (samples, metrics) array.
+
+        ``values`` may also be a list of dicts by metric name; ``generation``
+        is checked as in ``append``.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)[-self.history:]
+        if len(timestamps) == 0:
+            return
+        if isinstance(values, list) and isinstance(values[0], dict):
+            values = [self._row(sample) for sample in values]
+        values = np.asarray(values, dtype=np.float64)[-self.history:]
+        with self._lock:
+            if generation is not None and generation != self.generation(user_id):
+                return
+            slot = self._slot(user_id)
+            positions = (self._counts[slot] + np.arange(len(timestamps))) % self.history
+            self._values[slot, positions] = values
+            self._timestamps[slot, positions] = timestamps
+            self._counts[slot] += len(timestamps)
+
+    def last_timestamp(self, user_id: str) -> Optional[int]:
+        slot = self._slots.get(user_id)
+        if slot is None or self._counts[slot] == 0:
+            return None
+        return int(self._timestamps[slot, (self._counts[slot] - 1) % self.history])
+
+    def latest(self, user_id: str) -> Optional[MetricsRecord]:
+        """The user's most recent sample, or None if there is none."""
+        with self._lock:
+            slot = self._slots.get(user_id)
+            if slot is None or self._counts[slot] == 0:
+                return None
+            position = (self._counts[slot] - 1) % self.history
+            row = self._values[slot, position]
+            values = {metric: float(value) for metric, value in zip(self.metrics, row.tolist())
+                      if value == value}
+            return MetricsRecord(user_id, int(self._timestamps[slot, position]), values)
+
+    def latest_n(self, user_ids: Sequence[str], n: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The last ``n`` samples of many users, oldest first.
+
+        Returns timestamps (users, n) and values (users, n, metrics). Users
+        with fewer samples, or none, are padded at the front with 0 and NaN.
+        """
+        n = self.history if n is None else min(n, self.history)
+        with self._lock:
+            slots = np.array([self._slots.get(user_id, -1) for user_id in user_ids], dtype=np.int64)
+            known = slots >= 0
+            counts = np.where(known, self._counts[np.maximum(slots, 0)], 0)
+            # Sample k of n (oldest first) was the (n - k)-th most recent append
+            back = n - np.arange(n)
+            positions = (counts[:, None] - back[None, :]) % self.history
+            present = back[None, :] <= np.minimum(counts, self.history)[:, None]
+            rows = np.maximum(slots, 0)[:, None]
+            timestamps = np.where(present, self._timestamps[rows, positions], 0)
+            values = np.where(present[:, :, None], self._values[rows, positions], np.nan)
+        return timestamps, values
+
+    def remove(self, user_id: str):
+        """Forget a user and free their slot."""
+        with self._lock:
+            self._remove(user_id)
+
+    def invalidate_users(self, user_ids: Iterable[str]):
+        """Forget users whose stored metrics changed; they are reloaded on next use."""
+        with self._lock:
+            for user_id in set(user_ids):
+                self._generations[user_id] = self.generation(user_id) + 1
+                self._remove(user_id)
+
+    def _remove(self, user_id: str):
+        slot = self._slots.pop(user_id, None)
+        if slot is not None:
+            self._counts[slot] = 0
+            self._values[slot] = np.nan
+            self._timestamps[slot] = 0
+            self._free.append(slot)
+
+def init_app(app) -> RecentMetrics:
+    """Keep ``RECENT_HISTORY`` recent dashboard samples per user for a Flask app.
+
+    Users are dropped whenever the app's metrics store commits new data for
+    them and reloaded with their last ``RECENT_HISTORY`` samples on the next
+    read (see ``routes.latest_metrics``). Like the response cache this is per process: writes made by other
+    processes are only seen once the user is invalidated here.
+    """
+    recent = RecentMetrics(app.config['RECENT_METRICS'], app.config.get('RECENT_HISTORY', 24))
+    app.extensions['recent_metrics'] = recent
+    store = app.extensions.get('metrics_store')
+    if store is not None:
+        store.add_listener(recent.invalidate_users)
+    return recent
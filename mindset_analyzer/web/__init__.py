@@ -3,10 +3,20 @@ Web package for the mindset analyzer application.
 """ 
 
 from flask import Flask
+from .. import metrics_store, recent_metrics
+from .cache import init_app as init_cache
+from .config import config
+from .ingest_queue import init_app as init_ingest_queue
 from .routes import dashboard
 
-def create_app():
+def create_app(config_name='default'):
     app = Flask(__name__)
+    app.config.from_object(config[config_name])
+    metrics_store.init_app(app)
+    recent_metrics.init_app(app)
+    init_cache(app)
+    if app.config.get('INGEST_ASYNC'):
+        init_ingest_queue(app)
     
     # Register blueprints
     app.register_blueprint(dashboard)
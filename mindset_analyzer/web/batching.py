@@ -0,0 +1,81 @@
+"""
+Request coalescing for model predictions.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+class MicroBatcher:
+    """Coalesce concurrent prediction calls into single batched forward passes.
+
+    Callers block in ``submit`` while a background thread collects pending
+    windows for up to ``max_wait_ms`` (or until ``max_batch_size`` windows are
+    queued), stacks them, runs ``predict_fn`` once and hands every caller its
+    slice of the output.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, X: np.ndarray) -> np.ndarray:
+        """Predict for a batch of windows, sharing the forward pass with other callers."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._pending.put((X, future))
+        return future.result()
+
+    def close(self):
+        """Stop the worker once queued requests have been served."""
+        self._closed = True
+        self._pending.put(None)
+        self._worker.join()
+
+    def _collect(self, first):
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the shutdown marker back so the loop exits after this batch
+                self._pending.put(None)
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._pending.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            try:
+                predictions = self.predict_fn(np.concatenate([X for X, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for X, future in batch:
+                future.set_result(predictions[start:start + len(X)])
+                start += len(X)
@@ -0,0 +1,148 @@
+"""
+Response caching for the polled dashboard API endpoints.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Hashable, Iterable, NamedTuple, Optional, Tuple
+
+from flask import current_app, make_response, request
+
+from ..metrics_store import DEFAULT_USER
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Tuple[Tuple[str, str], ...]
+    etag: str
+    expires: float
+    user_id: str
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers) + 200
+
+class ResponseCache:
+    """LRU cache of response bodies, bounded by their total size in bytes.
+
+    Entries expire after their TTL and can be dropped per user when that
+    user's data changes.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """Get a fresh entry, marking it most recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def generation(self, user_id: str) -> int:
+        """Number of times the user's entries have been invalidated."""
+        return self._generations.get(user_id, 0)
+
+    def put(self, key: Hashable, body: bytes, headers: Tuple[Tuple[str, str], ...], ttl: float,
+            user_id: str, generation: int = None) -> CachedResponse:
+        """Store a response body and evict least recently used entries over the budget.
+
+        If ``generation`` is given and the user's data was invalidated since,
+        the body may be stale and is not stored.
+        """
+        entry = CachedResponse(body, headers, hashlib.sha1(body).hexdigest(),
+                               time.monotonic() + ttl, user_id)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if entry.size > self.max_bytes or (
+                    generation is not None and generation != self.generation(user_id)):
+                return entry
+            self._entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def invalidate_users(self, user_ids: Iterable[str]):
+        """Drop every entry cached for the given users."""
+        user_ids = set(user_ids)
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] = self.generation(user_id) + 1
+            for key in [key for key, entry in self._entries.items() if entry.user_id in user_ids]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def _remove(self, key: Hashable):
+        self.size -= self._entries.pop(key).size
+
+def init_app(app) -> ResponseCache:
+    """Create the app's response cache and drop entries when a user's metrics change."""
+    cache = ResponseCache(app.config.get('CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    app.extensions['response_cache'] = cache
+    store = app.extensions.get('metrics_store')
+    if store is not None:
+        store.add_listener(cache.invalidate_users)
+    return cache
+
+def cached(ttl: float):
+    """Cache a view's successful responses per (endpoint, user, query args).
+
+    ``ttl`` is in seconds and can be overridden per endpoint with the
+    ``CACHE_TTLS`` setting. Responses carry an ETag, so clients that send
+    ``If-None-Match`` get a 304 while the payload is unchanged.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            endpoint_ttl = current_app.config.get('CACHE_TTLS', {}).get(request.endpoint, ttl)
+            if cache is None or not endpoint_ttl:
+                return view(*args, **kwargs)
+
+            user_id = request.args.get('user_id', DEFAULT_USER)
+            key = (request.endpoint, user_id, tuple(sorted(request.args.items(multi=True))))
+            entry = cache.get(key)
+            if entry is None:
+                generation = cache.generation(user_id)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                headers = tuple((name, value) for name, value in response.headers.items()
+                                if name.lower() != 'content-length')
+                entry = cache.put(key, response.get_data(), headers, endpoint_ttl, user_id, generation)
+
+            response = current_app.response_class(entry.body, headers=list(entry.headers))
+            response.set_etag(entry.etag)
+            response.cache_control.private = True
+            response.cache_control.max_age = max(int(entry.expires - time.monotonic()), 0)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
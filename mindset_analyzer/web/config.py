@@ -7,13 +7,49 @@ class Config:
     
     # Database settings
     DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'mindset_data.db')
+    # Idle SQLite connections kept for reuse across requests
+    DATABASE_POOL_SIZE = 8
     
     # Model settings
-    MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models')
+    MODEL_PATH = os.environ.get('MODEL_PATH') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models')
+    # 'numpy' serves the TensorFlow-free export written by save_model; 'keras' loads the .h5
+    MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'numpy')
+    
+    # Prediction settings: coalesce concurrent /api/predict calls into one batch
+    PREDICT_BATCHING = True
+    PREDICT_MAX_BATCH_SIZE = 64
+    PREDICT_MAX_WAIT_MS = 5.0
+    
+    # Response cache for polled API endpoints; TTLs are in seconds and
+    # override the defaults given to @cached (0 disables caching)
+    CACHE_MAX_BYTES = 16 * 1024 * 1024
+    CACHE_TTLS = {
+        'dashboard.analytics_data': 300,
+        'dashboard.mode_history': 60,
+        'dashboard.daily_wisdom': 3600
+    }
+    
+    # Recent dashboard samples kept in memory per user
+    RECENT_METRICS = ['mindset_score', 'energy_level', 'focus_level', 'stress_level',
+                      'sleep_hours', 'exercise_minutes', 'social_interactions']
+    RECENT_HISTORY = 24
     
     # Data collection settings
     DATA_COLLECTION_INTERVAL = 3600  # 1 hour in seconds
     MAX_DATA_POINTS = 1000
+    INGEST_MAX_ROWS = 500000  # values per /api/ingest batch
+    
+    # Write-behind ingestion: requests queue batches for a background writer.
+    # Above the high-water mark (in values) requests wait up to
+    # INGEST_QUEUE_BLOCK_SECONDS and then get a 429. Failed writes are retried
+    # with exponential backoff; batches that still fail are only counted in
+    # /api/ingest-status, so a 202 does not guarantee the batch was stored.
+    INGEST_ASYNC = True
+    INGEST_QUEUE_HIGH_WATER = 200000
+    INGEST_MAX_WRITE_ROWS = 50000
+    INGEST_QUEUE_BLOCK_SECONDS = 0.0
+    INGEST_WRITE_RETRIES = 3
+    INGEST_RETRY_SECONDS = 0.5
     
     # Analysis settings
     ANALYSIS_WINDOW = 7  # days
@@ -42,6 +78,9 @@ class TestingConfig(Config):
     # Use in-memory database for testing
     DATABASE_PATH = ':memory:'
     
+    # Write ingested batches before responding
+    INGEST_ASYNC = False
+    
     # Disable rate limiting for testing
     API_RATE_LIMIT = None
 
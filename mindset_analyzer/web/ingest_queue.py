@@ -0,0 +1,163 @@
+"""
+Write-behind queue between ingestion requests and the metrics store.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Tuple
+
+from ..ingest import Batch
+from ..metrics_store import MetricsStore
+
+class QueueFull(Exception):
+    """Raised when accepting a batch would take the queue over its high-water mark."""
+
+class IngestQueue:
+    """Accept validated batches and write them to the store in the background.
+
+    ``submit`` returns as soon as a batch is queued. A writer thread drains
+    the queue, coalescing everything pending (up to ``max_write_rows``
+    values) into one ``insert_many`` transaction. When more than
+    ``high_water`` values are waiting, ``submit`` blocks for up to
+    ``block_seconds`` and then raises ``QueueFull``.
+
+    A failed write is retried up to ``write_retries`` times, waiting
+    ``retry_seconds`` and doubling that each time. Batches that still fail
+    are dropped and counted in ``failed_rows``, so an accepted batch is not
+    guaranteed to be stored.
+    """
+
+    def __init__(self, store: MetricsStore, high_water: int = 200000,
+                 max_write_rows: int = 50000, block_seconds: float = 0.0,
+                 write_retries: int = 3, retry_seconds: float = 0.5):
+        self.store = store
+        self.high_water = high_water
+        self.max_write_rows = max_write_rows
+        self.block_seconds = block_seconds
+        self.write_retries = write_retries
+        self.retry_seconds = retry_seconds
+        self._pending = deque()
+        self._pending_rows = 0
+        self._writing_rows = 0
+        self._closed = False
+        self._changed = threading.Condition()
+        self._stats = {
+            'queued_rows': 0,
+            'written_rows': 0,
+            'writes': 0,
+            'rejected_batches': 0,
+            'retried_writes': 0,
+            'failed_writes': 0,
+            'failed_rows': 0,
+            'last_error': None,
+            'write_seconds_total': 0.0,
+            'write_seconds_max': 0.0,
+        }
+        self._worker = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+        self._worker.start()
+
+    def submit(self, user_id: str, batch: Batch):
+        """Queue a batch for writing, applying backpressure above the high-water mark."""
+        deadline = time.monotonic() + self.block_seconds
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("IngestQueue is closed")
+            # A batch larger than the mark is still accepted into an empty queue
+            while self._pending_rows and self._pending_rows + batch.size > self.high_water:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    self._stats['rejected_batches'] += 1
+                    raise QueueFull(f"{self._pending_rows} values are waiting to be written")
+                self._changed.wait(timeout)
+            self._pending.append((user_id, batch))
+            self._pending_rows += batch.size
+            self._stats['queued_rows'] += batch.size
+            self._changed.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far has been written."""
+        with self._changed:
+            return self._changed.wait_for(lambda: not self._pending and not self._writing_rows, timeout)
+
+    def close(self, timeout: float = None):
+        """Stop accepting batches, write what is queued and stop the writer."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._worker.join(timeout)
+
+    def stats(self) -> Dict:
+        """Queue depth, throughput and write latency."""
+        with self._changed:
+            stats = dict(self._stats)
+            stats['pending_batches'] = len(self._pending)
+            stats['pending_rows'] = self._pending_rows + self._writing_rows
+        writes = stats['writes']
+        stats['write_seconds_mean'] = stats['write_seconds_total'] / writes if writes else 0.0
+        return stats
+
+    def _take(self) -> List[Tuple[str, Batch]]:
+        """Wait for batches and take as many as fit in one write."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._pending or self._closed)
+            taken = []
+            rows = 0
+            while self._pending and (not taken or rows + self._pending[0][1].size <= self.max_write_rows):
+                user_id, batch = self._pending.popleft()
+                taken.append((user_id, batch))
+                rows += batch.size
+            self._pending_rows -= rows
+            self._writing_rows = rows
+            # Room was freed for blocked submitters
+            self._changed.notify_all()
+            return taken
+
+    def _run(self):
+        while True:
+            taken = self._take()
+            if not taken:
+                # Closed and drained
+                return
+            rows = sum(batch.size for _, batch in taken)
+            start = time.perf_counter()
+            # insert_many replaces rows with the same key, so retrying is safe
+            for attempt in range(self.write_retries + 1):
+                if attempt:
+                    with self._changed:
+                        self._stats['retried_writes'] += 1
+                    time.sleep(self.retry_seconds * 2 ** (attempt - 1))
+                try:
+                    self.store.insert_many(row for user_id, batch in taken for row in batch.rows(user_id))
+                    error = None
+                    break
+                except Exception as e:
+                    error = f'{type(e).__name__}: {e}'
+                    with self._changed:
+                        self._stats['last_error'] = error
+            elapsed = time.perf_counter() - start
+            with self._changed:
+                if error is None:
+                    self._stats['written_rows'] += rows
+                else:
+                    self._stats['failed_writes'] += 1
+                    self._stats['failed_rows'] += rows
+                self._stats['writes'] += 1
+                self._stats['write_seconds_total'] += elapsed
+                self._stats['write_seconds_max'] = max(self._stats['write_seconds_max'], elapsed)
+                self._writing_rows = 0
+                self._changed.notify_all()
+
+def init_app(app) -> IngestQueue:
+    """Start the app's ingestion queue, flushed when the process exits."""
+    import atexit
+
+    queue = IngestQueue(app.extensions['metrics_store'],
+                        high_water=app.config.get('INGEST_QUEUE_HIGH_WATER', 200000),
+                        max_write_rows=app.config.get('INGEST_MAX_WRITE_ROWS', 50000),
+                        block_seconds=app.config.get('INGEST_QUEUE_BLOCK_SECONDS', 0.0),
+                        write_retries=app.config.get('INGEST_WRITE_RETRIES', 3),
+                        retry_seconds=app.config.get('INGEST_RETRY_SECONDS', 0.5))
+    app.extensions['ingest_queue'] = queue
+    atexit.register(queue.close)
+    return queue
@@ -1,7 +1,16 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, current_app, stream_with_context
 from datetime import datetime, timedelta
+import itertools
 import json
 import random
+import threading
+import zlib
+import numpy as np
+from ..metrics_store import DAY, DEFAULT_USER, from_epoch, to_epoch
+from .batching import MicroBatcher
+from .cache import cached
+from .ingest_queue import QueueFull
+from .config import Config
 
 # Create Blueprint
 dashboard = Blueprint('dashboard', __name__)
@@ -60,6 +69,56 @@ def collect_data(mode='dashboard'):
     
     return data
 
+def get_store():
+    """Get the app's metrics store."""
+    return current_app.extensions['metrics_store']
+
+def get_user_id():
+    """Get the user the request is for."""
+    return request.args.get('user_id', DEFAULT_USER)
+
+def mood_label(score):
+    """Describe a mindset score for the mood badge."""
+    return 'Positive' if score >= 70 else 'Neutral'
+
+def correlation(xs, ys):
+    """Pearson correlation of two equal-length sequences, or None if undefined."""
+    if len(xs) < 3 or np.std(xs) == 0 or np.std(ys) == 0:
+        return None
+    return round(float(np.corrcoef(xs, ys)[0, 1]), 2)
+
+def latest_metrics(store, user_id):
+    """Get the user's latest dashboard metrics, from memory when possible."""
+    recent = current_app.extensions.get('recent_metrics')
+    if recent is None:
+        return store.latest(user_id, 'dashboard')
+    record = recent.latest(user_id)
+    if record is not None:
+        return record.to_dict()
+    generation = recent.generation(user_id)
+    samples = store.latest_samples(user_id, 'dashboard', recent.history)
+    if not samples:
+        return {}
+    # Users with metrics the ring does not track are always read from the
+    # store, so the payload has the same keys on every request
+    if all(set(sample) - {'timestamp'} <= set(recent.metrics) for sample in samples):
+        timestamps = [to_epoch(datetime.fromisoformat(sample['timestamp'])) for sample in samples]
+        recent.extend(user_id, timestamps, samples, generation)
+    return dict(samples[-1])
+
+def stored_data(store, user_id, mode):
+    """Build the dashboard payload from the latest stored metrics."""
+    metrics = latest_metrics(store, user_id)
+    timestamp = metrics.pop('timestamp', datetime.now().isoformat())
+    metrics.setdefault('mood', mood_label(metrics.get('mindset_score', 0)))
+    mode_data = store.latest(user_id, mode) if mode != 'dashboard' else {}
+    mode_data.pop('timestamp', None)
+    return {
+        'metrics': metrics,
+        'mode_data': mode_data,
+        'timestamp': timestamp
+    }
+
 @dashboard.route('/')
 def index():
     """Render the main dashboard page."""
@@ -114,9 +173,22 @@ def help():
 def dashboard_data():
     """Get dashboard data for the current mode."""
     mode = request.args.get('mode', 'dashboard')
-    return jsonify(collect_data(mode))
+    user_id = get_user_id()
+    store = get_store()
+    if not store.has_data(user_id):
+        # Nothing recorded yet: show simulated data so the dashboard renders
+        data = collect_data(mode)
+    else:
+        data = stored_data(store, user_id, mode)
+    
+    # Live model output, once the user has streamed a full window of features
+    predictor = current_streaming_predictor()
+    if predictor is not None and predictor.ready(user_id):
+        data['prediction'] = predictor.predict(user_id)
+    return jsonify(data)
 
 @dashboard.route('/api/daily-wisdom')
+@cached(ttl=3600)
 def daily_wisdom():
     """Get a random wisdom quote."""
     quotes = [
@@ -128,26 +200,175 @@ def daily_wisdom():
     ]
     return jsonify(random.choice(quotes))
 
+def history_entry(date, metrics, mode_data):
+    """One point of a mode history."""
+    return {
+        'date': date,
+        'data': {
+            'metrics': metrics,
+            'mode_data': mode_data,
+            'timestamp': date
+        }
+    }
+
+def simulated_history(mode, start, end):
+    """Yield simulated daily history from end back to start."""
+    date = end
+    while date >= start:
+        yield {'date': date.strftime('%Y-%m-%d'), 'data': collect_data(mode)}
+        date -= timedelta(days=1)
+
+def stored_history(store, user_id, mode, start, end, width=None):
+    """Yield stored history newest first.
+
+    Without ``width`` there is one point per day, read from the daily rollups;
+    otherwise hourly samples are averaged into ``width``-second buckets.
+    """
+    def series(category):
+        if width is None:
+            for day in reversed(store.daily_means(user_id, category, start, end)):
+                yield day.pop('date'), day
+        else:
+            for bucket in store.iter_buckets(user_id, category, start, end, width, descending=True):
+                yield bucket.pop('timestamp'), bucket
+    
+    # Both series are newest first, so mode data is matched with a merge join
+    mode_series = series(mode) if mode != 'dashboard' else iter(())
+    mode_date, mode_data = next(mode_series, (None, {}))
+    for date, metrics in series('dashboard'):
+        while mode_date is not None and mode_date > date:
+            mode_date, mode_data = next(mode_series, (None, {}))
+        yield history_entry(date, metrics, mode_data if mode_date == date else {})
+
+def bounded_int(name, default, low, high):
+    """Read an integer query argument clamped to [low, high]."""
+    return min(max(int(request.args.get(name, default)), low), high)
+
 @dashboard.route('/api/mode-history')
+@cached(ttl=60)
 def mode_history():
-    """Get historical data for the current mode."""
+    """Get historical data for the current mode, newest first.
+    
+    Query arguments:
+        days: how many UTC days to cover, today included (at most
+            MAX_DATA_POINTS)
+        resolution: 'day' (default) or 'hour'; hourly samples are averaged
+            into buckets so that the range has at most ``points`` entries
+        limit: page size (at most MAX_DATA_POINTS)
+        cursor: the ``date`` of the last entry of the previous page
+        format: 'json' (default) or 'ndjson' to stream one entry per line
+    
+    JSON pages carry the next cursor in the ``X-Next-Cursor`` header; an
+    NDJSON stream ends with a ``{"next_cursor": ...}`` line instead.
+    """
+    max_points = current_app.config.get('MAX_DATA_POINTS', Config.MAX_DATA_POINTS)
     mode = request.args.get('mode', 'dashboard')
-    days = int(request.args.get('days', 7))
+    resolution = request.args.get('resolution', 'day')
+    try:
+        days = bounded_int('days', 7, 1, max_points)
+        limit = bounded_int('limit', max_points, 1, max_points)
+        points = bounded_int('points', max_points, 1, max_points)
+        cursor = request.args.get('cursor')
+        cursor = datetime.fromisoformat(cursor) if cursor else None
+        if resolution not in ('day', 'hour'):
+            raise ValueError("resolution must be 'day' or 'hour'")
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    user_id = get_user_id()
+    store = get_store()
+    now = datetime.utcnow()
     
-    history = []
-    for i in range(days):
-        date = datetime.now() - timedelta(days=i)
-        history.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'data': collect_data(mode)
-        })
+    if not store.has_data(user_id):
+        # Nothing recorded yet: simulate one point per day, today included
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        start = today - timedelta(days=days - 1)
+        end = cursor - timedelta(days=1) if cursor else today
+        entries = simulated_history(mode, start, end)
+    else:
+        # The bucket width depends only on the full range so pages line up
+        width = None if resolution == 'day' else 3600 * -(-days * 24 // points)
+        # Half-open: the current bucket and those before it, ``days`` in all
+        step = DAY if width is None else width
+        end = from_epoch((to_epoch(now) // step + 1) * step)
+        start = end - timedelta(days=days)
+        if cursor:
+            end = cursor
+        entries = stored_history(store, user_id, mode, start, end - timedelta(seconds=1), width)
+    
+    if request.args.get('format') == 'ndjson':
+        def stream():
+            count = 0
+            last = None
+            for entry in entries:
+                if count == limit:
+                    yield json.dumps({'next_cursor': last}) + '\n'
+                    return
+                yield json.dumps(entry) + '\n'
+                last = entry['date']
+                count += 1
+        return current_app.response_class(stream_with_context(stream()),
+                                          mimetype='application/x-ndjson')
     
-    return jsonify(history)
+    history = list(itertools.islice(entries, limit + 1))
+    response = jsonify(history[:limit])
+    if len(history) > limit:
+        response.headers['X-Next-Cursor'] = history[limit - 1]['date']
+    return response
+
+# Factors correlated with the daily mindset score: (category, metric)
+CORRELATION_FACTORS = {
+    'sleep': ('dashboard', 'sleep_hours'),
+    'exercise': ('dashboard', 'exercise_minutes'),
+    'meditation': ('spiritual', 'meditation_minutes'),
+    'social': ('dashboard', 'social_interactions')
+}
+
+def stored_analytics(store, user_id, days=30):
+    """Build the analytics payload from stored daily means."""
+    end = datetime.utcnow()
+    start = end - timedelta(days=days)
+    daily = store.daily_means(user_id, 'dashboard', start, end)
+    mode_daily = {}
+    for category in {category for category, _ in CORRELATION_FACTORS.values()} - {'dashboard'}:
+        mode_daily[category] = {day['date']: day for day in store.daily_means(user_id, category, start, end)}
+    
+    weekdays = [[] for _ in range(7)]
+    for day in daily:
+        if 'mindset_score' in day:
+            weekdays[datetime.strptime(day['date'], '%Y-%m-%d').weekday()].append(day['mindset_score'])
+    
+    correlations = {}
+    for factor, (category, metric) in CORRELATION_FACTORS.items():
+        pairs = []
+        for day in daily:
+            source = day if category == 'dashboard' else mode_daily[category].get(day['date'], {})
+            if 'mindset_score' in day and metric in source:
+                pairs.append((day['mindset_score'], source[metric]))
+        correlations[factor] = correlation(*zip(*pairs)) if pairs else None
+    
+    return {
+        'daily_patterns': [round(float(np.mean(scores)), 1) if scores else None for scores in weekdays],
+        'correlations': correlations,
+        'trends': {
+            'mindset': [day.get('mindset_score') for day in daily],
+            'energy': [day.get('energy_level') for day in daily],
+            'focus': [day.get('focus_level') for day in daily]
+        }
+    }
 
 @dashboard.route('/api/analytics-data')
+@cached(ttl=300)
 def analytics_data():
     """Get analytics data for visualization."""
     try:
+        user_id = get_user_id()
+        store = get_store()
+        if store.has_data(user_id):
+            return jsonify(stored_analytics(store, user_id))
+        
         data = {
             'daily_patterns': [random.randint(50, 100) for _ in range(7)],
             'correlations': {
@@ -166,6 +387,218 @@ def analytics_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@dashboard.route('/api/ingest', methods=['POST'])
+def ingest_samples():
+    """Store a batch of samples from the mobile app or a wearable.
+    
+    Accepts JSON (``{"samples": [{"category", "timestamp", "metrics"}]}``)
+    or, with Content-Type ``application/x-npz``, a NumPy archive of columns.
+    With ``INGEST_ASYNC`` the validated batch is queued for the background
+    writer and 202 is returned; a full queue answers 429. A 202 does not
+    guarantee storage: writes that fail after retries are reported by
+    ``/api/ingest-status``. Otherwise the batch is written in one
+    transaction before responding.
+    """
+    from .. import ingest
+    
+    try:
+        if request.mimetype in ('application/x-npz', 'application/octet-stream'):
+            batch = ingest.parse_npz(request.get_data())
+        else:
+            batch = ingest.parse_json(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    max_rows = current_app.config.get('INGEST_MAX_ROWS', Config.INGEST_MAX_ROWS)
+    if batch.size > max_rows:
+        return jsonify({
+            'success': False,
+            'message': f'Batch has {batch.size} values; the limit is {max_rows}'
+        }), 413
+    
+    user_id = get_user_id()
+    batch, counts = ingest.prepare(batch)
+    queue = current_app.extensions.get('ingest_queue')
+    if queue is None:
+        counts['written'] = get_store().insert_many(batch.rows(user_id)) if batch.size else 0
+        return jsonify({'success': True, **counts})
+    
+    try:
+        if batch.size:
+            queue.submit(user_id, batch)
+    except QueueFull as e:
+        response = jsonify({
+            'success': False,
+            'message': str(e)
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 429
+    return jsonify({'success': True, 'queued': batch.size, **counts}), 202
+
+@dashboard.route('/api/ingest-status')
+def ingest_status():
+    """Report the ingestion queue's depth and write latency."""
+    queue = current_app.extensions.get('ingest_queue')
+    return jsonify({
+        'success': True,
+        'async': queue is not None,
+        'queue': queue.stats() if queue is not None else None
+    })
+
+def load_model():
+    """Get the worker's shared model for the configured model path."""
+    # Imported here so the dashboard does not load the ML stack until a
+    # prediction is requested.
+    from model_registry import get_model
+    
+    return get_model(current_app.config.get('MODEL_PATH', Config.MODEL_PATH),
+                     current_app.config.get('MODEL_BACKEND', Config.MODEL_BACKEND))
+
+_batcher_lock = threading.Lock()
+
+def get_batcher():
+    """Get the app's prediction batcher, starting it on first use."""
+    batcher = current_app.extensions.get('predict_batcher')
+    if batcher is None:
+        from model_registry import get_model
+        
+        with _batcher_lock:
+            batcher = current_app.extensions.get('predict_batcher')
+            if batcher is None:
+                model_path = current_app.config.get('MODEL_PATH', Config.MODEL_PATH)
+                backend = current_app.config.get('MODEL_BACKEND', Config.MODEL_BACKEND)
+                batcher = MicroBatcher(
+                    lambda X: get_model(model_path, backend).predict(X, verbose=0),
+                    max_batch_size=current_app.config.get('PREDICT_MAX_BATCH_SIZE', 64),
+                    max_wait_ms=current_app.config.get('PREDICT_MAX_WAIT_MS', 5.0))
+                current_app.extensions['predict_batcher'] = batcher
+    return batcher
+
+_predictor_lock = threading.Lock()
+
+def get_streaming_predictor():
+    """Get the app's live predictor, starting over when the model is reloaded."""
+    from streaming_predictor import StreamingPredictor
+    
+    model = load_model()
+    predictor = current_app.extensions.get('streaming_predictor')
+    if predictor is None or predictor.model is not model:
+        with _predictor_lock:
+            predictor = current_app.extensions.get('streaming_predictor')
+            if predictor is None or predictor.model is not model:
+                # Buffered samples were scaled for the previous model
+                predictor = StreamingPredictor(model)
+                current_app.extensions['streaming_predictor'] = predictor
+    return predictor
+
+def current_streaming_predictor():
+    """Get the app's live predictor if one was started for the model now served.
+
+    A predictor left over from a replaced (or removed) model is dropped, as
+    its buffered samples were scaled for that model.
+    """
+    predictor = current_app.extensions.get('streaming_predictor')
+    if predictor is None:
+        return None
+    try:
+        model = load_model()
+    except FileNotFoundError:
+        model = None
+    if predictor.model is model:
+        return predictor
+    with _predictor_lock:
+        if current_app.extensions.get('streaming_predictor') is predictor:
+            del current_app.extensions['streaming_predictor']
+    return None
+
+def prepare_windows(model, payload):
+    """Turn raw feature rows from a request into scaled model input windows."""
+    if 'windows' in payload:
+        windows = np.asarray(payload['windows'], dtype=float)
+    elif 'features' in payload:
+        windows = np.asarray([payload['features']], dtype=float)
+    else:
+        raise ValueError("Request must include 'features' or 'windows'")
+    n_features = len(model.scaler.mean_)
+    if windows.ndim != 3 or windows.shape[1:] != (model.sequence_length, n_features):
+        raise ValueError(f"Expected windows of shape ({model.sequence_length}, {n_features})")
+    scaled = model.scaler.transform(windows.reshape(-1, n_features))
+    return scaled.reshape(windows.shape)
+
+@dashboard.route('/api/predict', methods=['POST'])
+def predict():
+    """Predict mindset metrics from one or more windows of hourly features."""
+    from train_model import TARGET_COLUMNS
+    
+    try:
+        model = load_model()
+    except FileNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+    
+    try:
+        X = prepare_windows(model, request.get_json() or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    if current_app.config.get('PREDICT_BATCHING', False):
+        predictions = get_batcher().submit(X)
+    else:
+        predictions = model.predict(X, verbose=0)
+    return jsonify({
+        'success': True,
+        'predictions': [dict(zip(TARGET_COLUMNS, map(float, row))) for row in predictions]
+    })
+
+@dashboard.route('/api/live-features', methods=['POST'])
+def live_features():
+    """Append the latest hourly feature samples for live predictions.
+    
+    ``features`` is one sample, as a list in model column order or a dict
+    keyed by feature name; ``samples`` is a list of them, oldest first.
+    """
+    try:
+        predictor = get_streaming_predictor()
+    except FileNotFoundError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+    
+    payload = request.get_json(silent=True) or {}
+    user_id = get_user_id()
+    try:
+        if 'samples' in payload:
+            samples = payload['samples']
+        elif 'features' in payload:
+            samples = [payload['features']]
+        else:
+            raise ValueError("Request must include 'features' or 'samples'")
+        # Validate everything first so a bad sample does not leave a partial update
+        vectors = [predictor.to_vector(sample) for sample in samples]
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    count = 0
+    for vector in vectors:
+        count = predictor.append(user_id, vector)
+    return jsonify({
+        'success': True,
+        'samples': count,
+        'prediction': predictor.predict(user_id)
+    })
+
 @dashboard.route('/api/settings', methods=['GET'])
 def get_settings():
     try:
@@ -234,24 +667,73 @@ def change_password():
             'message': str(e)
         }), 500
 
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def export_chunks(rows, fmt, batch_size=1000):
+    """Serialise (category, timestamp, metric, value) rows a batch at a time."""
+    if fmt == 'csv':
+        yield 'category,timestamp,metric,value\n'
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        if fmt == 'csv':
+            # Categories and metric names are identifiers, so no quoting is needed
+            yield ''.join(f'{category},{from_epoch(ts).isoformat()},{metric},{value!r}\n'
+                          for category, ts, metric, value in batch)
+        else:
+            yield ''.join(json.dumps({'category': category, 'timestamp': from_epoch(ts).isoformat(),
+                                      'metric': metric, 'value': value}) + '\n'
+                          for category, ts, metric, value in batch)
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks on the fly."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
 @dashboard.route('/api/export-data')
 def export_data():
+    """Stream a user's stored metrics as a download.
+    
+    Query arguments:
+        format: 'ndjson' (default, one JSON object per row) or 'csv'
+        gzip: '1' to compress the download
+        start, end: optional ISO timestamps bounding the export
+        categories: optional comma-separated categories to include
+    """
+    fmt = request.args.get('format', 'ndjson')
     try:
-        # Collect all data
-        data = collect_data(historical=True)
-        
-        # Convert to JSON string
-        json_data = json.dumps(data, indent=2)
-        
-        return json_data, 200, {
-            'Content-Type': 'application/json',
-            'Content-Disposition': 'attachment; filename=mindset_data.json'
-        }
-    except Exception as e:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.fromisoformat(start) if start else None
+        end = datetime.fromisoformat(end) if end else None
+    except ValueError as e:
         return jsonify({
             'success': False,
             'message': str(e)
-        }), 500
+        }), 400
+    categories = [c for c in request.args.get('categories', '').split(',') if c]
+    compress = request.args.get('gzip') in ('1', 'true')
+    
+    rows = get_store().iter_rows(get_user_id(), start, end, categories)
+    chunks = export_chunks(rows, fmt)
+    filename = f'mindset_data.{fmt}'
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+    return current_app.response_class(
+        stream_with_context(chunks),
+        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 @dashboard.route('/api/delete-account', methods=['POST'])
 def delete_account():
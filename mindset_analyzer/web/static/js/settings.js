@@ -138,7 +138,7 @@ exportButton.addEventListener('click', async function() {
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement('a');
         a.href = url;
-        a.download = 'mindset_data.json';
+        a.download = 'mindset_data.ndjson';
         document.body.appendChild(a);
         a.click();
         window.URL.revokeObjectURL(url);
@@ -0,0 +1,63 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+from numpy_model import NUMPY_MODEL_FILE, NumpyModel
+from train_model import MindsetModel
+
+MODEL_FILE = 'mindset_model.h5'
+# 'numpy' serves the export written by save_model without loading TensorFlow
+MODEL_FILES = {'keras': MODEL_FILE, 'numpy': NUMPY_MODEL_FILE}
+SCALER_FILES = ['scaler.npz', 'scaler.npy']
+
+class ModelRegistry:
+    """Process-wide cache of trained models, reloaded when their files change."""
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str], Tuple[tuple, MindsetModel]] = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, path: str, backend: str) -> tuple:
+        if backend not in MODEL_FILES:
+            raise ValueError(f"backend must be one of {sorted(MODEL_FILES)}")
+        model_file = os.path.join(path, MODEL_FILES[backend])
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"No trained model found in {path}")
+        files = [model_file] + [os.path.join(path, name) for name in SCALER_FILES]
+        return tuple(os.stat(f).st_mtime_ns if os.path.exists(f) else None for f in files)
+
+    def get(self, path: str = "models", backend: str = 'keras') -> MindsetModel:
+        """Return the loaded model for ``path``, loading or reloading it if needed.
+
+        With ``backend='numpy'`` a ``NumpyModel`` with the same prediction API
+        is returned. The returned model is shared; callers must not refit its
+        scaler.
+        """
+        key = (os.path.abspath(path), backend)
+        signature = self._signature(key[0], backend)
+        entry = self._models.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None or entry[0] != signature:
+                if backend == 'numpy':
+                    model = NumpyModel.load(key[0])
+                else:
+                    model = MindsetModel()
+                    model.load_model(key[0])
+                entry = (signature, model)
+                self._models[key] = entry
+            return entry[1]
+
+    def clear(self):
+        """Drop every cached model."""
+        with self._lock:
+            self._models.clear()
+
+registry = ModelRegistry()
+
+def get_model(path: str = "models", backend: str = 'keras') -> MindsetModel:
+    """Return the shared model for ``path`` from the process-wide registry."""
+    return registry.get(path, backend)
@@ -0,0 +1,199 @@
+import argparse
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Serving artifact written next to the Keras model by MindsetModel.save_model
+NUMPY_MODEL_FILE = 'mindset_model.npz'
+
+FORMAT_VERSION = 1
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    # tanh form: no overflow warnings for large negative inputs
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': sigmoid,
+    'tanh': np.tanh,
+}
+
+def export_weights(network) -> Dict[str, np.ndarray]:
+    """Extract a Keras stack of LSTM, Dense and Dropout layers as plain arrays.
+
+    Each kept layer becomes a ``kind:option`` entry in ``layers`` (``lstm:sequences``,
+    ``lstm:last`` or ``dense:<activation>``) with its weights under
+    ``<index>_<name>``. Dropout is the identity at inference and is dropped.
+    """
+    arrays = {}
+    layers = []
+    for layer in network.layers:
+        kind = type(layer).__name__
+        config = layer.get_config()
+        if kind == 'Dropout':
+            continue
+        if kind == 'LSTM':
+            if (config['activation'] != 'tanh' or config['recurrent_activation'] != 'sigmoid'
+                    or not config['use_bias'] or config.get('go_backwards') or config.get('stateful')):
+                raise ValueError(f"Unsupported LSTM configuration in layer {layer.name}")
+            kernel, recurrent, bias = layer.get_weights()
+            spec = 'lstm:sequences' if config['return_sequences'] else 'lstm:last'
+            weights = {'kernel': kernel, 'recurrent': recurrent, 'bias': bias}
+        elif kind == 'Dense':
+            if config['activation'] not in ACTIVATIONS or not config['use_bias']:
+                raise ValueError(f"Unsupported Dense configuration in layer {layer.name}")
+            kernel, bias = layer.get_weights()
+            spec = f"dense:{config['activation']}"
+            weights = {'kernel': kernel, 'bias': bias}
+        else:
+            raise ValueError(f"Cannot export {kind} layer {layer.name}")
+        for name, value in weights.items():
+            arrays[f'{len(layers)}_{name}'] = np.asarray(value, dtype=np.float32)
+        layers.append(spec)
+    arrays['layers'] = np.asarray(layers, dtype=str)
+    arrays['input_shape'] = np.asarray(network.input_shape[1:], dtype=np.int64)
+    arrays['format_version'] = np.asarray(FORMAT_VERSION)
+    return arrays
+
+def save_weights(network, path: str):
+    """Write ``export_weights(network)`` to an .npz file, replacing it atomically."""
+    tmp = path + '.tmp.npz'
+    np.savez(tmp, **export_weights(network))
+    os.replace(tmp, path)
+
+def lstm(X: np.ndarray, kernel: np.ndarray, recurrent: np.ndarray, bias: np.ndarray,
+         return_sequences: bool) -> np.ndarray:
+    """Keras-compatible LSTM over (batch, time, features); gates are ordered i, f, c, o."""
+    batch, steps, _ = X.shape
+    units = recurrent.shape[0]
+    # The input projection of every time step in one matrix product
+    projected = (X.reshape(batch * steps, -1) @ kernel + bias).reshape(batch, steps, 4 * units)
+    h = np.zeros((batch, units), dtype=X.dtype)
+    c = np.zeros((batch, units), dtype=X.dtype)
+    outputs = np.empty((batch, steps, units), dtype=X.dtype) if return_sequences else None
+    for t in range(steps):
+        z = projected[:, t] + h @ recurrent
+        i = sigmoid(z[:, :units])
+        f = sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            outputs[:, t] = h
+    return outputs if return_sequences else h
+
+class ArrayScaler:
+    """The part of a fitted StandardScaler that inference uses, without scikit-learn."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean_) / self.scale_
+
+class NumpyModel:
+    """CPU inference for an exported model, with the serving API of ``MindsetModel``.
+
+    Loads ``mindset_model.npz`` and the plain-array ``scaler.npz`` from a
+    model directory, so neither TensorFlow nor scikit-learn is imported.
+    """
+
+    def __init__(self, layers: List[Tuple[str, str, Dict[str, np.ndarray]]], input_shape: Tuple[int, int],
+                 scaler: ArrayScaler, feature_columns: List[str] = None):
+        self.layers = layers
+        self.input_shape = input_shape
+        self.sequence_length = input_shape[0]
+        self.scaler = scaler
+        self.feature_columns = feature_columns
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyModel':
+        """Load the exported network and scaler from a model directory.
+
+        Raises FileNotFoundError if either file is missing; a model saved
+        before ``scaler.npz`` existed has to be exported again (see
+        ``export_model_dir``).
+        """
+        with np.load(os.path.join(path, NUMPY_MODEL_FILE), allow_pickle=False) as arrays:
+            if int(arrays['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"Unsupported {NUMPY_MODEL_FILE} format {int(arrays['format_version'])}")
+            layers = []
+            for index, spec in enumerate(arrays['layers'].tolist()):
+                kind, option = spec.split(':')
+                names = ('kernel', 'recurrent', 'bias') if kind == 'lstm' else ('kernel', 'bias')
+                layers.append((kind, option, {name: arrays[f'{index}_{name}'] for name in names}))
+            input_shape = tuple(arrays['input_shape'].tolist())
+
+        scaler_path = os.path.join(path, 'scaler.npz')
+        if not os.path.exists(scaler_path):
+            raise FileNotFoundError(f"No scaler.npz in {path}; run `python numpy_model.py {path}`")
+        feature_columns = None
+        with np.load(scaler_path, allow_pickle=False) as arrays:
+            scaler = ArrayScaler(arrays['mean'], arrays['scale'])
+            if 'feature_columns' in arrays and len(arrays['feature_columns']):
+                feature_columns = arrays['feature_columns'].tolist()
+        return cls(layers, input_shape, scaler, feature_columns)
+
+    @property
+    def n_outputs(self) -> int:
+        kind, _, weights = self.layers[-1]
+        if kind == 'lstm':
+            return weights['recurrent'].shape[0]
+        return weights['kernel'].shape[1]
+
+    def _forward(self, X: np.ndarray) -> np.ndarray:
+        for kind, option, weights in self.layers:
+            if kind == 'lstm':
+                X = lstm(X, weights['kernel'], weights['recurrent'], weights['bias'],
+                         return_sequences=option == 'sequences')
+            else:
+                X = ACTIVATIONS[option](X @ weights['kernel'] + weights['bias'])
+        return X
+
+    def predict(self, X: np.ndarray, verbose='auto', batch_size: int = None) -> np.ndarray:
+        """Predict from scaled (batch, sequence_length, features) windows.
+
+        ``verbose`` is accepted for compatibility and ignored. Batches run
+        ``batch_size`` windows at a time (1024 by default) to bound memory.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape[1:] != self.input_shape:
+            raise ValueError(f"Expected windows of shape {self.input_shape}, got {X.shape[1:]}")
+        if len(X) == 0:
+            return np.empty((0, self.n_outputs), dtype=np.float32)
+        batch_size = batch_size or 1024
+        return np.concatenate([self._forward(X[i:i + batch_size])
+                               for i in range(0, len(X), batch_size)])
+
+    def predict_window(self, window: np.ndarray) -> np.ndarray:
+        """Predict the metrics following one scaled (sequence_length, features) window."""
+        return self.predict(window[np.newaxis])[0]
+
+def export_model_dir(path: str) -> float:
+    """Export a saved Keras model directory to ``mindset_model.npz`` and ``scaler.npz``.
+
+    Models saved before ``scaler.npz`` existed get it written from their
+    pickled ``scaler.npy``. Returns the largest absolute difference from
+    Keras on random windows.
+    """
+    from train_model import MindsetModel
+
+    model = MindsetModel()
+    model.load_model(path)
+    if not os.path.exists(os.path.join(path, 'scaler.npz')):
+        model.save_scaler(os.path.join(path, 'scaler.npz'))
+    save_weights(model.model, os.path.join(path, NUMPY_MODEL_FILE))
+    X = np.random.default_rng(0).standard_normal((64,) + tuple(model.model.input_shape[1:])).astype(np.float32)
+    return float(np.abs(NumpyModel.load(path).predict(X) - model.predict(X, verbose=0)).max())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a saved model for inference without TensorFlow.")
+    parser.add_argument('path', nargs='?', default='models', help="model directory")
+    args = parser.parse_args()
+
+    difference = export_model_dir(args.path)
+    print(f"exported {args.path} (max difference from Keras {difference:.2e})")
@@ -0,0 +1,142 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from train_model import TARGET_COLUMNS
+
+# Bump when the rendering changes so cached reports are redrawn
+RENDER_VERSION = 1
+
+FORMATS = ('png', 'svg')
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of ``n_out`` points that keep the shape of a series.
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept and
+    every bucket in between contributes the point that forms the largest
+    triangle with the previously chosen point and the next bucket's mean.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.linspace(0, n - 1, n_out).astype(int)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+        area = np.abs((x[a] - mean_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (mean_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def results_hash(results: pd.DataFrame, **options) -> str:
+    """Content hash of prediction results and the options they are drawn with."""
+    digest = hashlib.sha256(f'{RENDER_VERSION}|{sorted(options.items())}'.encode())
+    digest.update(pd.util.hash_pandas_object(results[['timestamp'] + TARGET_COLUMNS], index=False)
+                  .to_numpy().tobytes())
+    return digest.hexdigest()
+
+def render_patterns(results: pd.DataFrame, path: str, title: str = None, max_points: int = 1000):
+    """Draw the four predicted metrics over time and save the figure to ``path``.
+
+    Uses the Agg canvas and a standalone ``Figure``, so nothing touches
+    pyplot's global state and the figure is freed once rendered. Series
+    longer than ``max_points`` are downsampled with LTTB. The format follows
+    the file extension.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    timestamps = pd.to_datetime(results['timestamp']).to_numpy()
+    x = timestamps.astype('datetime64[ns]').astype(np.int64)
+    fig = Figure(figsize=(15, 10))
+    FigureCanvasAgg(fig)
+    try:
+        for i, metric in enumerate(TARGET_COLUMNS, 1):
+            ax = fig.add_subplot(2, 2, i)
+            values = results[metric].to_numpy()
+            keep = lttb(x, values, max_points)
+            ax.plot(timestamps[keep], values[keep], linewidth=1)
+            ax.set_title(f'{metric.replace("_", " ").title()} Over Time')
+            ax.tick_params(axis='x', labelrotation=45)
+        if title:
+            fig.suptitle(title)
+        fig.tight_layout()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        fig.savefig(path)
+    finally:
+        fig.clear()
+
+def render_cached(results: pd.DataFrame, cache_dir: str, fmt: str = 'png', title: str = None,
+                  max_points: int = 1000) -> str:
+    """Render a report unless one for identical input is cached; return its path."""
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {FORMATS}")
+    key = results_hash(results, title=title, max_points=max_points)
+    path = os.path.join(cache_dir, f'{key}.{fmt}')
+    if not os.path.exists(path):
+        tmp = os.path.join(cache_dir, f'{key}.{os.getpid()}.tmp.{fmt}')
+        render_patterns(results, tmp, title, max_points)
+        os.replace(tmp, path)
+    return path
+
+def render_reports(results: pd.DataFrame, cache_dir: str = 'visualizations/cache', fmt: str = 'png',
+                   workers: int = None, max_points: int = 1000) -> Dict[str, str]:
+    """Render one report per user across a process pool.
+
+    ``results`` is indexed by (user_id, timestamp), as returned by
+    ``MindsetAnalyzer.analyze_users``. Returns the report path per user;
+    reports whose input is unchanged are served from ``cache_dir`` without
+    starting a worker.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = {}
+    pending = {}
+    for user_id, frame in results.groupby(level='user_id', sort=False):
+        frame = frame.reset_index(level='timestamp').reset_index(drop=True)
+        key = results_hash(frame, title=user_id, max_points=max_points)
+        path = os.path.join(cache_dir, f'{key}.{fmt}')
+        if os.path.exists(path):
+            paths[user_id] = path
+        else:
+            pending[user_id] = frame
+    if not pending:
+        return paths
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    # Spawned workers do not inherit a TensorFlow runtime from the parent
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {user_id: pool.submit(render_cached, frame, cache_dir, fmt, user_id, max_points)
+                   for user_id, frame in pending.items()}
+        for user_id, future in futures.items():
+            paths[user_id] = future.result()
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render per-user pattern reports from a results table.")
+    parser.add_argument('results', help="CSV with user_id, timestamp and the predicted metrics")
+    parser.add_argument('--cache-dir', default='visualizations/cache')
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-points', type=int, default=1000)
+    args = parser.parse_args()
+
+    table = pd.read_csv(args.results, parse_dates=['timestamp']).set_index(['user_id', 'timestamp'])
+    for user, report in render_reports(table, args.cache_dir, args.format, args.workers,
+                                       args.max_points).items():
+        print(f"{user}: {report}")
@@ -0,0 +1,105 @@
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+from train_model import MindsetModel, TARGET_COLUMNS
+
+class UserWindow:
+    """The last ``length`` scaled feature vectors of one user.
+
+    Every sample is written twice, at ``i`` and ``i + length``, so the most
+    recent ``length`` samples are always the contiguous slice
+    ``buffer[i + 1:i + 1 + length]`` and reading the window never copies
+    or reorders.
+    """
+    __slots__ = ('buffer', 'count', 'prediction')
+
+    def __init__(self, length: int, n_features: int):
+        self.buffer = np.zeros((2 * length, n_features), dtype=np.float32)
+        self.count = 0
+        self.prediction = None
+
+    def append(self, x: np.ndarray):
+        length = len(self.buffer) // 2
+        i = self.count % length
+        self.buffer[i] = x
+        self.buffer[i + length] = x
+        self.count += 1
+        self.prediction = None
+
+    def window(self) -> np.ndarray:
+        length = len(self.buffer) // 2
+        i = (self.count - 1) % length
+        return self.buffer[i + 1:i + 1 + length]
+
+class StreamingPredictor:
+    """Live predictions from per-user windows updated one hourly sample at a time.
+
+    Appending scales the raw feature vector with the model's scaler and
+    writes it into the user's ring buffer in O(features). Once a user has
+    ``sequence_length`` samples, ``predict`` runs a single-window forward
+    pass; the result is cached until the next sample arrives.
+    """
+
+    def __init__(self, model: MindsetModel):
+        self.model = model
+        self.length = model.sequence_length
+        self.mean = model.scaler.mean_.astype(np.float32)
+        self.scale = model.scaler.scale_.astype(np.float32)
+        self._windows: Dict[str, UserWindow] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def n_features(self) -> int:
+        return len(self.mean)
+
+    def to_vector(self, features) -> np.ndarray:
+        """Order a feature dict by the model's columns, or check a raw vector's length."""
+        if isinstance(features, dict):
+            if not self.model.feature_columns:
+                raise ValueError("Model has no feature names; send features as a list")
+            missing = [col for col in self.model.feature_columns if col not in features]
+            if missing:
+                raise ValueError(f"Missing features: {missing}")
+            features = [features[col] for col in self.model.feature_columns]
+        x = np.asarray(features, dtype=np.float32)
+        if x.shape != (self.n_features,) or not np.isfinite(x).all():
+            raise ValueError(f"Expected {self.n_features} finite feature values")
+        return x
+
+    def append(self, user_id: str, features) -> int:
+        """Add the next hourly sample of raw features; returns the user's sample count."""
+        x = (self.to_vector(features) - self.mean) / self.scale
+        with self._lock:
+            window = self._windows.get(user_id)
+            if window is None:
+                window = self._windows[user_id] = UserWindow(self.length, self.n_features)
+            window.append(x)
+            return window.count
+
+    def ready(self, user_id: str) -> bool:
+        window = self._windows.get(user_id)
+        return window is not None and window.count >= self.length
+
+    def predict(self, user_id: str) -> Optional[Dict[str, float]]:
+        """Predict the user's next metrics, or None until a full window has arrived."""
+        with self._lock:
+            window = self._windows.get(user_id)
+            if window is None or window.count < self.length:
+                return None
+            if window.prediction is not None:
+                return window.prediction
+            x = window.window().copy()
+            count = window.count
+        
+        # Other users' samples can be appended while the network runs
+        prediction = dict(zip(TARGET_COLUMNS, map(float, self.model.predict_window(x))))
+        with self._lock:
+            if window.count == count:
+                window.prediction = prediction
+        return prediction
+
+    def reset(self, user_id: str):
+        with self._lock:
+            self._windows.pop(user_id, None)
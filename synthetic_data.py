@@ -0,0 +1,159 @@
+import argparse
+import time
+from datetime import datetime
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_store import CATEGORIES, SCHEMAS, ColumnarStorage, StorageBackend
+
+HOURS = np.arange(24)
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+def ar1(noise: np.ndarray, phi: float, state: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Unit-variance AR(1) driven by ``noise`` of shape (users, days, 24).
+
+    Each day is solved at once with a lower-triangular kernel of powers of
+    ``phi``; only the carry from one day to the next is sequential. Returns
+    the series and the last value per user, to continue from in the next
+    chunk.
+    """
+    lags = HOURS[:, None] - HOURS[None, :]
+    kernel = np.where(lags >= 0, phi ** np.maximum(lags, 0), 0.0)
+    within = np.einsum('ts,uds->udt', kernel, noise * np.sqrt(1 - phi ** 2))
+    carry = np.empty(noise.shape[:2])
+    for day in range(noise.shape[1]):
+        carry[:, day] = state
+        state = within[:, day, -1] + phi ** 24 * state
+    return within + carry[:, :, None] * phi ** (HOURS + 1), state
+
+# Persistence of the hourly latent factors behind the generated data
+LATENTS = {
+    'mood': 0.97,
+    'energy': 0.95,
+    'stress': 0.9,
+    'weather': 0.99,
+}
+
+def generate_chunks(n_users: int, start: datetime, days: int, seed: int = 0,
+                    chunk_days: int = 30, missing_rate: float = 0.02
+                    ) -> Iterator[Tuple[np.ndarray, Dict[str, Tuple[Dict[str, np.ndarray], np.ndarray]]]]:
+    """Simulate hourly data for all users, ``chunk_days`` at a time.
+
+    Every user has a chronotype (circadian phase) and baselines; mood,
+    energy, stress and weather follow AR(1) processes that carry across
+    chunks, and each category is derived from them, so the categories are
+    correlated the way the model expects. Each sample is missing with
+    probability ``missing_rate``.
+
+    Yields the chunk's timestamps and, per category, a dict of (users,
+    hours) column arrays and a (users, hours) mask of present samples. The
+    output depends only on the arguments, including ``chunk_days``.
+    """
+    rng = np.random.default_rng(seed)
+    phase = rng.normal(0, 1.5, n_users)[:, None, None]
+    fitness = rng.normal(0, 0.5, n_users)[:, None, None]
+    sociability = rng.lognormal(0, 0.3, n_users)[:, None, None]
+    climate = rng.normal(0, 3, n_users)[:, None, None]
+    state = {name: rng.standard_normal(n_users) for name in LATENTS}
+
+    first_hour = pd.Timestamp(start).floor('h').hour
+    for chunk_start in range(0, days, chunk_days):
+        n_days = min(chunk_days, days - chunk_start)
+        shape = (n_users, n_days, 24)
+        timestamps = (np.datetime64(pd.Timestamp(start).floor('h').as_unit('ns'))
+                      + np.arange(chunk_start * 24, (chunk_start + n_days) * 24) * np.timedelta64(1, 'h'))
+        hour = (first_hour + HOURS) % 24
+
+        latent = {}
+        for name, phi in LATENTS.items():
+            latent[name], state[name] = ar1(rng.standard_normal(shape), phi, state[name])
+        noise = lambda scale: rng.normal(0, scale, shape)
+
+        # Circadian rhythm peaks mid-afternoon, shifted by chronotype
+        circadian = np.cos(2 * np.pi * (hour - 15 - phase) / 24)
+        awake = sigmoid(4 * (circadian + 0.4))
+        daylight = np.maximum(np.cos(2 * np.pi * (hour - 13) / 24), 0)
+
+        movement = np.clip(awake * (0.25 + 0.12 * latent['energy'] + 0.1 * fitness) + noise(0.08), 0, 1)
+        stress = sigmoid(latent['stress'] + noise(0.3))
+        sleep_quality = sigmoid(0.8 * latent['mood'] - 0.6 * latent['stress'] + noise(0.3))
+
+        categories = {
+            'activity': {
+                'steps': np.clip(np.round(movement * 1000 + noise(40)), 0, 999),
+                'movement_level': movement,
+                'exercise_minutes': np.clip(np.round(60 * movement ** 2 * rng.random(shape) * 2), 0, 59),
+            },
+            'social': {
+                'social_interactions': np.minimum(rng.poisson(2.5 * awake * sociability), 9),
+                'message_count': np.minimum(rng.poisson(6 * awake * sociability), 19),
+                'social_media_usage': np.minimum(rng.poisson(8 * awake * (1 + 0.4 * stress)), 29),
+            },
+            'physiological': {
+                'heart_rate': np.clip(np.round(62 + 25 * movement + 10 * stress + noise(3)), 60, 99),
+                'stress_level': stress,
+                'sleep_quality': sleep_quality,
+            },
+            'environmental': {
+                'temperature': np.clip(21 + climate + 4 * daylight + 2 * latent['weather'] + noise(0.5), 15, 30),
+                'humidity': np.clip(50 - 6 * latent['weather'] - 8 * daylight + noise(2), 30, 70),
+                'light_level': np.clip(daylight * (0.75 + 0.15 * latent['weather']) + noise(0.03), 0, 1),
+            },
+            'mindset': {
+                'mood_score': sigmoid(latent['mood'] + 0.8 * (sleep_quality - 0.5) + 0.6 * movement - stress),
+                'energy_level': sigmoid(latent['energy'] + 1.2 * circadian + 0.8 * (sleep_quality - 0.5)),
+                'focus_level': sigmoid(0.8 * circadian + 0.5 * latent['energy'] - 0.6 * latent['stress']),
+                'stress_level': sigmoid(1.2 * latent['stress'] - 0.4 * latent['mood'] + noise(0.2)),
+            },
+        }
+
+        chunk = {}
+        for category, columns in categories.items():
+            present = rng.random(shape) >= missing_rate
+            chunk[category] = (
+                {col: np.broadcast_to(values, shape).reshape(n_users, -1).astype(SCHEMAS[category][col])
+                 for col, values in columns.items()},
+                present.reshape(n_users, -1))
+        yield timestamps, chunk
+
+def write_synthetic(storage: StorageBackend, n_users: int, start: datetime, days: int,
+                    seed: int = 0, chunk_days: int = 30, missing_rate: float = 0.02,
+                    user_prefix: str = 'synthetic') -> int:
+    """Generate data for users ``<user_prefix>0000...`` and write it chunk by chunk.
+
+    Returns the number of rows written across all categories.
+    """
+    rows = 0
+    for timestamps, chunk in generate_chunks(n_users, start, days, seed, chunk_days, missing_rate):
+        for user in range(n_users):
+            user_id = f'{user_prefix}{user:04d}'
+            for category in CATEGORIES:
+                columns, present = chunk[category]
+                mask = present[user]
+                frame = pd.DataFrame({'timestamp': timestamps[mask],
+                                      **{col: values[user, mask] for col, values in columns.items()}})
+                storage.write(category, frame, user_id)
+                rows += len(frame)
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic hourly data for load testing.")
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--start', type=datetime.fromisoformat, default=datetime(2025, 1, 1))
+    parser.add_argument('--root', default='data', help="columnar store directory")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-days', type=int, default=30)
+    parser.add_argument('--missing-rate', type=float, default=0.02)
+    parser.add_argument('--user-prefix', default='synthetic')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = write_synthetic(ColumnarStorage(args.root), args.users, args.start, args.days, args.seed,
+                           args.chunk_days, args.missing_rate, args.user_prefix)
+    elapsed = time.perf_counter() - started
+    print(f"wrote {rows} rows for {args.users} users in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pytest
+
+from mindset_analyzer import ingest
+from mindset_analyzer.metrics_store import MetricsStore
+
+NOW = 1767225600  # 2026-01-01
+
+def sample(timestamp, category='dashboard', **metrics):
+    return {'category': category, 'timestamp': timestamp, 'metrics': metrics}
+
+def test_validate_rejects_bad_rows():
+    batch = ingest.parse_json({'samples': [
+        sample(NOW, mindset_score=80),
+        sample(NOW, category='unknown', mindset_score=80),
+        sample(NOW, mindset_score=float('inf')),
+        sample(900000000, mindset_score=80),
+        sample(NOW + 2 * ingest.MAX_CLOCK_SKEW, mindset_score=80),
+    ]})
+    valid, rejected = ingest.validate(batch, now=NOW)
+    assert rejected == 4
+    assert valid.timestamps.tolist() == [NOW]
+
+def test_missing_metrics_are_not_rows():
+    batch = ingest.parse_json({'samples': [sample(NOW, mindset_score=80), sample(NOW + 3600, energy_level=5)]})
+    assert batch.size == 2
+    assert sorted(zip(batch.metrics.tolist(), batch.timestamps.tolist())) == [
+        ('energy_level', NOW + 3600), ('mindset_score', NOW)]
+
+def test_deduplicate_keeps_the_last_value_sent():
+    batch = ingest.parse_json({'samples': [
+        sample(NOW, mindset_score=1, energy_level=5),
+        sample(NOW, mindset_score=2),
+        sample(NOW, category='energy', mindset_score=3),
+        sample(NOW, mindset_score=4),
+    ]})
+    deduplicated, dropped = ingest.deduplicate(batch)
+    assert dropped == 2
+    values = {(c, m): v for c, m, v in zip(deduplicated.categories.tolist(), deduplicated.metrics.tolist(),
+                                           deduplicated.values.tolist())}
+    assert values == {('dashboard', 'mindset_score'): 4.0, ('dashboard', 'energy_level'): 5.0,
+                      ('energy', 'mindset_score'): 3.0}
+
+@pytest.mark.parametrize('payload', [
+    {},
+    {'samples': [{'timestamp': NOW}]},
+    {'samples': [sample(NOW, **{'Bad-Name': 1})]},
+    {'samples': [sample(10 ** 30, mindset_score=1)]},
+])
+def test_malformed_json_raises_value_error(payload):
+    with pytest.raises(ValueError):
+        ingest.parse_json(payload)
+
+def test_npz_matches_json():
+    buffer = io.BytesIO()
+    np.savez(buffer, timestamp=np.array([NOW, NOW + 3600]), mindset_score=np.array([80.0, np.nan]),
+             energy_level=np.array([5.0, 6.0]))
+    from_npz = ingest.parse_npz(buffer.getvalue())
+    from_json = ingest.parse_json({'samples': [sample(NOW, mindset_score=80, energy_level=5),
+                                               sample(NOW + 3600, energy_level=6)]})
+    assert sorted(from_npz.rows('u')) == sorted(from_json.rows('u'))
+
+def test_ingest_counts():
+    store = MetricsStore(':memory:')
+    batch = ingest.parse_json({'samples': [sample(NOW, mindset_score=1), sample(NOW, mindset_score=2),
+                                           sample(NOW, category='unknown', mindset_score=3)]})
+    counts = ingest.ingest(store, 'u', batch)
+    assert counts == {'received': 3, 'rejected': 1, 'duplicates': 1, 'written': 1}
+    assert store.latest('u', 'dashboard')['mindset_score'] == 2.0
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from mindset_analyzer.metrics_store import MetricsStore
+
+START = datetime(2026, 1, 26)
+
+def rollups(store):
+    return store._fetch('SELECT * FROM rollups ORDER BY user_id, category, period, bucket, metric', ())
+
+def assert_same_rollups(store):
+    incremental = rollups(store)
+    store.rebuild_rollups()
+    rebuilt = rollups(store)
+    assert len(incremental) == len(rebuilt)
+    for a, b in zip(incremental, rebuilt):
+        assert a[:6] == b[:6]
+        np.testing.assert_allclose(a[6:], b[6:])
+
+@pytest.fixture
+def store():
+    return MetricsStore(':memory:')
+
+def test_incremental_rollups_match_rebuild(store):
+    rng = np.random.default_rng(0)
+    hours = [START + timedelta(hours=h) for h in range(24 * 40)]
+    for chunk in range(0, len(hours), 100):
+        store.insert_points('u1', 'dashboard', hours[chunk:chunk + 100],
+                            {'mindset_score': rng.uniform(0, 100, 100).tolist()})
+    store.insert_points('u2', 'energy', hours[:50], {'energy_level': rng.uniform(0, 10, 50).tolist()})
+    assert_same_rollups(store)
+
+def test_replacing_values_updates_rollups(store):
+    hours = [START + timedelta(hours=h) for h in range(48)]
+    store.insert_points('u1', 'dashboard', hours, {'mindset_score': [50.0] * 48})
+    # Replace the day's maximum with a lower value and add new rows in the same batch
+    store.insert_points('u1', 'dashboard', [hours[0], START + timedelta(days=3)],
+                        {'mindset_score': [10.0, 90.0]})
+    store.insert_points('u1', 'dashboard', [hours[1]], {'mindset_score': [99.0]})
+    store.insert_points('u1', 'dashboard', [hours[1]], {'mindset_score': [20.0]})
+    assert_same_rollups(store)
+
+    day = store.rollup_series('u1', 'dashboard', 'day', START, START)[0]['mindset_score']
+    assert day['count'] == 24
+    assert (day['min'], day['max']) == (10.0, 50.0)
+    assert day['mean'] == pytest.approx((22 * 50 + 10 + 20) / 24)
+
+def test_resending_rows_changes_nothing(store):
+    hours = [START + timedelta(hours=h) for h in range(5)]
+    assert store.insert_points('u1', 'dashboard', hours, {'mindset_score': [1.0, 2, 3, 4, 5]}) == 5
+    assert store.insert_points('u1', 'dashboard', hours, {'mindset_score': [1.0, 2, 3, 4, 5]}) == 0
+    assert store.summary('u1', 'dashboard', START, START + timedelta(days=1))['mindset_score']['count'] == 5
+
+def test_latest_samples_are_oldest_first(store):
+    hours = [START + timedelta(hours=h) for h in range(10)]
+    store.insert_points('u1', 'dashboard', hours, {'mindset_score': list(map(float, range(10)))})
+    samples = store.latest_samples('u1', 'dashboard', 3)
+    assert [sample['mindset_score'] for sample in samples] == [7.0, 8.0, 9.0]
+    assert store.latest_samples('u2', 'dashboard', 3) == []
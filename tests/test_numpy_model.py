@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from numpy_model import FORMAT_VERSION, NUMPY_MODEL_FILE, ArrayScaler, NumpyModel
+
+def make_model(seed=0, steps=4, features=3, units=5, outputs=2):
+    rng = np.random.default_rng(seed)
+    layers = [
+        ('lstm', 'last', {'kernel': rng.standard_normal((features, 4 * units)).astype(np.float32),
+                          'recurrent': rng.standard_normal((units, 4 * units)).astype(np.float32),
+                          'bias': rng.standard_normal(4 * units).astype(np.float32)}),
+        ('dense', 'linear', {'kernel': rng.standard_normal((units, outputs)).astype(np.float32),
+                             'bias': rng.standard_normal(outputs).astype(np.float32)}),
+    ]
+    return NumpyModel(layers, (steps, features), ArrayScaler(np.zeros(features), np.ones(features)))
+
+def test_empty_input_gives_empty_predictions():
+    model = make_model()
+    predictions = model.predict(np.empty((0, 4, 3)))
+    assert predictions.shape == (0, 2)
+
+def test_wrong_window_shape_is_rejected():
+    with pytest.raises(ValueError):
+        make_model().predict(np.zeros((2, 5, 3)))
+
+def test_batches_match_a_single_pass():
+    model = make_model()
+    X = np.random.default_rng(1).standard_normal((10, 4, 3))
+    np.testing.assert_allclose(model.predict(X, batch_size=3), model.predict(X), rtol=1e-6)
+    np.testing.assert_allclose(model.predict_window(X[0]), model.predict(X)[0], rtol=1e-6)
+
+def test_load_requires_scaler(tmp_path):
+    model = make_model()
+    arrays = {'layers': np.array(['lstm:last', 'dense:linear']), 'input_shape': np.array([4, 3]),
+              'format_version': np.array(FORMAT_VERSION)}
+    for index, (_, _, weights) in enumerate(model.layers):
+        arrays.update((f'{index}_{name}', value) for name, value in weights.items())
+    np.savez(tmp_path / NUMPY_MODEL_FILE, **arrays)
+    with pytest.raises(FileNotFoundError):
+        NumpyModel.load(str(tmp_path))
+
+    np.savez(tmp_path / 'scaler.npz', mean=np.zeros(3), scale=np.ones(3), feature_columns=np.array(['a', 'b', 'c']))
+    loaded = NumpyModel.load(str(tmp_path))
+    assert loaded.feature_columns == ['a', 'b', 'c']
+    X = np.random.default_rng(2).standard_normal((2, 4, 3))
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
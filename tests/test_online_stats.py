@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from mindset_analyzer.online_stats import (CorrelationAccumulator, MetricSummary, RunningStats,
+                                           TrendSlope, lagged_correlation)
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).normal(50, 10, 500)
+
+def test_running_stats_merge_matches_one_pass(values):
+    left, right = RunningStats(), RunningStats()
+    for x in values[:123]:
+        left.update(x)
+    right.update_batch(values[123:])
+    left.merge(right)
+    assert left.count == len(values)
+    assert left.mean == pytest.approx(values.mean())
+    assert left.variance == pytest.approx(values.var(ddof=1))
+    assert (left.min, left.max) == (values.min(), values.max())
+
+def test_trend_slope_matches_least_squares(values):
+    y = values + 0.3 * np.arange(len(values))
+    trend = TrendSlope()
+    trend.update_batch(y[:200])
+    for y_i in y[200:]:
+        trend.update(y_i)
+    assert trend.slope == pytest.approx(np.polyfit(np.arange(len(y)), y, 1)[0])
+
+def test_metric_summary_merge_matches_one_pass(values):
+    whole, first, second = MetricSummary(), MetricSummary(), MetricSummary()
+    whole.update_batch(values)
+    first.update_batch(values[:300])
+    second.update_batch(values[300:])
+    first.merge(second)
+    assert first.stats.variance == pytest.approx(whole.stats.variance)
+    assert first.trend.slope == pytest.approx(whole.trend.slope)
+    assert first.ewma.value == pytest.approx(whole.ewma.value)
+    assert (first.rolling.min, first.rolling.max) == (whole.rolling.min, whole.rolling.max)
+
+def test_correlation_accumulator_merge_matches_numpy():
+    rng = np.random.default_rng(1)
+    block = rng.standard_normal((400, 4))
+    block[:, 1] += block[:, 0]
+    accumulator, other = CorrelationAccumulator(4), CorrelationAccumulator(4)
+    accumulator.update(block[:150])
+    other.update(block[150:])
+    accumulator.merge(other)
+    np.testing.assert_allclose(accumulator.covariance(), np.cov(block, rowvar=False))
+    np.testing.assert_allclose(accumulator.correlation(), np.corrcoef(block, rowvar=False))
+
+def test_lagged_correlation_pairs_t_with_t_plus_lag():
+    rng = np.random.default_rng(2)
+    features = rng.standard_normal((200, 2))
+    targets = np.roll(features[:, :1], 3, axis=0)
+    lagged = lagged_correlation(features, targets, 3)
+    assert lagged.shape == (2, 1)
+    assert lagged[0, 0] == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        lagged_correlation(features, targets, -1)
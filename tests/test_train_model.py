@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from train_model import contiguous_windows, make_sequences
+
+def test_windows_are_paired_with_the_next_target():
+    X = np.arange(20, dtype=float).reshape(10, 2)
+    y = np.arange(10, dtype=float)
+    X_seq, y_seq = make_sequences(X, y, 3)
+    assert X_seq.shape == (7, 3, 2)
+    for i in range(7):
+        np.testing.assert_array_equal(X_seq[i], X[i:i + 3])
+        assert y_seq[i] == y[i + 3]
+
+def test_stride_skips_windows():
+    X = np.arange(10, dtype=float)[:, None]
+    X_seq, y_seq = make_sequences(X, X[:, 0], 3, stride=2)
+    assert X_seq[:, 0, 0].tolist() == [0, 2, 4, 6]
+    assert y_seq.tolist() == [3, 5, 7, 9]
+    with pytest.raises(ValueError):
+        make_sequences(X, X[:, 0], 3, stride=0)
+
+def test_short_input_gives_no_windows():
+    X_seq, y_seq = make_sequences(np.zeros((3, 2)), np.zeros((3, 4)), 3)
+    assert X_seq.shape == (0, 3, 2)
+    assert y_seq.shape == (0, 4)
+    assert contiguous_windows(pd.date_range('2026-01-01', periods=3, freq='h'), 3).shape == (0,)
+
+def test_windows_across_a_gap_are_dropped():
+    timestamps = list(pd.date_range('2026-01-01', periods=10, freq='h'))
+    del timestamps[5]
+    mask = contiguous_windows(timestamps, 3)
+    # Windows starting at rows 2, 3 and 4 reach across the missing hour
+    assert mask.tolist() == [True, True, False, False, False, True]
+
+    X = np.arange(9, dtype=float)[:, None]
+    X_seq, y_seq = make_sequences(X, X[:, 0], 3, timestamps=timestamps)
+    assert y_seq.tolist() == [3, 4, 8]
+
+def test_jitter_within_half_an_interval_is_contiguous():
+    start = datetime(2026, 1, 1)
+    timestamps = [start, start + timedelta(minutes=70), start + timedelta(minutes=110),
+                  start + timedelta(minutes=205)]
+    assert contiguous_windows(timestamps, 3).tolist() == [True]
@@ -1,54 +1,195 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM, Dropout
-from tensorflow.keras.optimizers import Adam
+from numpy.lib.stride_tricks import sliding_window_view
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Iterator, Iterable
+
+# scikit-learn and TensorFlow are imported where they are first needed so
+# that importing this module (e.g. from the CLI or a web worker) stays fast.
+
+TARGET_COLUMNS = ['mood_score', 'energy_level', 'focus_level', 'stress_level']
+FEATURE_CATEGORIES = ['activity', 'social', 'physiological', 'environmental']
+
+def contiguous_windows(timestamps, sequence_length: int, stride: int = 1,
+                       interval: timedelta = timedelta(hours=1)) -> np.ndarray:
+    """Mask of the windows built by ``make_sequences`` that span no gap.
+
+    Aligned data drops timestamps where a category is missing, so rows
+    that are adjacent by position can be hours apart. Window i and its
+    target are rows i * stride to i * stride + sequence_length; they are
+    contiguous if the target comes ``sequence_length`` intervals after the
+    first row, with half an interval of slack for jitter.
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    if len(timestamps) <= sequence_length:
+        return np.zeros(0, dtype=bool)
+    span = timestamps[sequence_length:] - timestamps[:-sequence_length]
+    return (span <= np.timedelta64(pd.Timedelta(interval) * (sequence_length + 0.5)))[::stride]
+
+def make_sequences(X: np.ndarray, y: np.ndarray, sequence_length: int,
+                   stride: int = 1, timestamps=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Build (window, target) pairs as read-only views into X and y.
+
+    Window i covers X[i * stride:i * stride + sequence_length] and is paired
+    with the target y[i * stride + sequence_length], matching the original
+    loop-based construction without copying the (N, sequence_length, F) block.
+    Given the rows' ``timestamps``, windows across a gap are dropped (see
+    ``contiguous_windows``); the result is then a copy if any were.
+    """
+    if stride < 1:
+        raise ValueError("stride must be >= 1")
+    if len(X) <= sequence_length:
+        return (np.empty((0, sequence_length, X.shape[1]), dtype=X.dtype),
+                np.empty((0,) + y.shape[1:], dtype=y.dtype))
+    # The last window has no following target, so it is left out.
+    windows = sliding_window_view(X[:-1], sequence_length, axis=0)
+    X_sequences = windows.transpose(0, 2, 1)[::stride]
+    y_sequences = y[sequence_length::stride]
+    if timestamps is not None:
+        keep = contiguous_windows(timestamps, sequence_length, stride)
+        if not keep.all():
+            X_sequences, y_sequences = X_sequences[keep], y_sequences[keep]
+    return X_sequences, y_sequences
+
+def iter_sequence_batches(X: np.ndarray, y: np.ndarray, sequence_length: int,
+                          batch_size: int = 32, stride: int = 1
+                          ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Lazily yield contiguous batches of windows, one batch in memory at a time."""
+    X_sequences, y_sequences = make_sequences(X, y, sequence_length, stride)
+    for start in range(0, len(X_sequences), batch_size):
+        stop = start + batch_size
+        yield (np.ascontiguousarray(X_sequences[start:stop]),
+               np.ascontiguousarray(y_sequences[start:stop]))
 
 class MindsetModel:
     def __init__(self):
         self.model = None
-        self.scaler = StandardScaler()
+        self._scaler = None
+        self.feature_columns = None
         self.sequence_length = 24  # 24 hours of data
+        self._window_fn = None
+    
+    @property
+    def scaler(self):
+        """Feature scaler, created on first use."""
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+    
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
         
-    def prepare_data(self, data: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare data for model training."""
-        # Combine all features
-        features = []
-        for category in ['activity', 'social', 'physiological', 'environmental']:
-            if category in data:
-                df = data[category]
-                features.extend(df.select_dtypes(include=[np.number]).columns)
-        
-        # Create feature matrix
-        X = np.zeros((len(data['mindset']), len(features)))
-        for i, feature in enumerate(features):
-            for category in ['activity', 'social', 'physiological', 'environmental']:
-                if category in data and feature in data[category].columns:
-                    X[:, i] = data[category][feature].values
-                    break
+    def prepare_data(self, data: Dict[str, pd.DataFrame], stride: int = 1,
+                     fit_scaler: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare data for model training.
+
+        The returned sequences are strided views over the scaled feature
+        matrix rather than copies; see ``make_sequences``. Pass
+        ``fit_scaler=False`` to reuse a scaler fitted with
+        ``partial_fit_scaler``.
+        """
+        X = self.feature_matrix(data)
         
         # Create target matrix (mindset features)
-        y = data['mindset'][['mood_score', 'energy_level', 'focus_level', 'stress_level']].values
+        y = data['mindset'][TARGET_COLUMNS].values
         
         # Scale features
-        X = self.scaler.fit_transform(X)
+        if fit_scaler:
+            X = self.scaler.fit_transform(X)
+        else:
+            X = self._transform(X)
+        
+        # Create sequences, leaving out windows across gaps in the data
+        return make_sequences(X, y, self.sequence_length, stride,
+                              timestamps=self.row_timestamps(data))
+    
+    def prepare_inference_data(self, data: Dict[str, pd.DataFrame], stride: int = 1) -> np.ndarray:
+        """Prepare prediction windows using the already fitted scaler.
+
+        Windows line up with ``prepare_data``: windows across gaps in the
+        data are left out and each window is followed by the sample at
+        ``window_timestamps(data, stride)``. No targets are needed.
+        """
+        X = self._transform(self.feature_matrix(data))
+        if len(X) <= self.sequence_length:
+            return np.empty((0, self.sequence_length, X.shape[1]), dtype=X.dtype)
+        windows = sliding_window_view(X[:-1], self.sequence_length, axis=0)
+        windows = windows.transpose(0, 2, 1)[::stride]
+        timestamps = self.row_timestamps(data)
+        if timestamps is not None:
+            keep = contiguous_windows(timestamps, self.sequence_length, stride)
+            if not keep.all():
+                windows = windows[keep]
+        return windows
+    
+    def window_timestamps(self, data: Dict[str, pd.DataFrame], stride: int = 1) -> np.ndarray:
+        """Timestamps of the samples the ``prepare_inference_data`` windows predict."""
+        timestamps = self.row_timestamps(data)
+        if timestamps is None or len(timestamps) <= self.sequence_length:
+            return np.empty(0, dtype='datetime64[ns]')
+        targets = timestamps[self.sequence_length::stride]
+        return targets[contiguous_windows(timestamps, self.sequence_length, stride)]
+    
+    @staticmethod
+    def row_timestamps(data: Dict[str, pd.DataFrame]):
+        """Row timestamps of aligned data, from the mindset frame or any category.
+
+        Returns None when no frame has a ``timestamp`` column; windows are
+        then built by position without checking for gaps.
+        """
+        for category in ['mindset'] + FEATURE_CATEGORIES:
+            if category in data and 'timestamp' in data[category]:
+                return data[category]['timestamp'].to_numpy(dtype='datetime64[ns]')
+        return None
+    
+    def partial_fit_scaler(self, chunks: Iterable[Dict[str, pd.DataFrame]]):
+        """Incrementally fit the scaler over chunks of data too large to load at once."""
+        for chunk in chunks:
+            self.scaler.partial_fit(self.feature_matrix(chunk))
+    
+    def _transform(self, X: np.ndarray) -> np.ndarray:
+        if not hasattr(self.scaler, 'mean_'):
+            raise ValueError("Scaler not fitted yet!")
+        return self.scaler.transform(X)
+    
+    def feature_matrix(self, data: Dict[str, pd.DataFrame]) -> np.ndarray:
+        """Stack the numeric columns of the input categories into one matrix.
+
+        Columns are named ``<category>_<column>`` so that names shared by two
+        categories (e.g. ``stress_level``) stay distinct. The first call fixes
+        ``feature_columns``; later calls with a different schema fail.
+        """
+        blocks = []
+        columns = []
+        for category in FEATURE_CATEGORIES:
+            if category in data:
+                df = data[category].select_dtypes(include=[np.number])
+                blocks.append(df.to_numpy(dtype=np.float64))
+                columns.extend(f'{category}_{col}' for col in df.columns)
         
-        # Create sequences
-        X_sequences = []
-        y_sequences = []
-        for i in range(len(X) - self.sequence_length):
-            X_sequences.append(X[i:(i + self.sequence_length)])
-            y_sequences.append(y[i + self.sequence_length])
+        if self.feature_columns is None:
+            self.feature_columns = columns
+        elif columns != self.feature_columns:
+            raise ValueError(f"Feature schema changed: expected {self.feature_columns}, got {columns}")
         
-        return np.array(X_sequences), np.array(y_sequences)
+        lengths = {len(block) for block in blocks}
+        if 'mindset' in data:
+            lengths.add(len(data['mindset']))
+        if len(lengths) > 1:
+            raise ValueError("Data categories are not row-aligned")
+        if not blocks:
+            return np.empty((len(data.get('mindset', ())), 0))
+        return np.hstack(blocks)
     
     def build_model(self, input_shape: Tuple[int, int], output_shape: int):
         """Build the LSTM model."""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, LSTM, Dropout
+        from tensorflow.keras.optimizers import Adam
+        
         self.model = Sequential([
             LSTM(128, input_shape=input_shape, return_sequences=True),
             Dropout(0.2),
@@ -66,6 +207,8 @@ class MindsetModel:
     
     def train(self, X: np.ndarray, y: np.ndarray, epochs: int = 50, batch_size: int = 32):
         """Train the model."""
+        from sklearn.model_selection import train_test_split
+        
         X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
         
         if self.model is None:
@@ -81,28 +224,100 @@ class MindsetModel:
         
         return history
     
-    def predict(self, X: np.ndarray) -> np.ndarray:
+    def train_dataset(self, train_dataset, val_dataset=None, epochs: int = 50):
+        """Train the model on streaming ``tf.data`` datasets of (window, target) batches."""
+        if self.model is None:
+            self.build_model((self.sequence_length, len(self.scaler.mean_)), len(TARGET_COLUMNS))
+        
+        history = self.model.fit(
+            train_dataset,
+            epochs=epochs,
+            validation_data=val_dataset,
+            verbose=1
+        )
+        
+        return history
+    
+    def predict(self, X: np.ndarray, verbose='auto', batch_size: int = None) -> np.ndarray:
         """Make predictions using the trained model."""
         if self.model is None:
             raise ValueError("Model not trained yet!")
         
-        return self.model.predict(X)
+        return self.model.predict(X, batch_size=batch_size, verbose=verbose)
+    
+    def predict_window(self, window: np.ndarray) -> np.ndarray:
+        """Predict the metrics following one scaled (sequence_length, features) window.
+
+        Runs the network as a compiled graph traced on first use, skipping
+        ``predict``'s per-call dataset setup, which dominates the cost of a
+        single window.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet!")
+        
+        if self._window_fn is None or self._window_fn[0] is not self.model:
+            import tensorflow as tf
+            
+            network = self.model
+            signature = tf.TensorSpec((None,) + tuple(network.input_shape[1:]), tf.float32)
+            self._window_fn = (network, tf.function(lambda x: network(x, training=False),
+                                                    input_signature=[signature]))
+        return self._window_fn[1](window[np.newaxis].astype(np.float32)).numpy()[0]
     
     def save_model(self, path: str):
-        """Save the trained model."""
+        """Save the trained model, its scaler and a NumPy export of the network.
+
+        Each file is written under a temporary name and renamed into place,
+        so a worker reloading the model never reads a half-written file.
+        """
         if self.model is None:
             raise ValueError("No model to save!")
         
+        from numpy_model import NUMPY_MODEL_FILE, save_weights
+        
         os.makedirs(path, exist_ok=True)
-        self.model.save(os.path.join(path, 'mindset_model.h5'))
-        np.save(os.path.join(path, 'scaler.npy'), self.scaler)
+        model_file = os.path.join(path, 'mindset_model.h5')
+        self.model.save(model_file + '.tmp.h5')
+        os.replace(model_file + '.tmp.h5', model_file)
+        self.save_scaler(os.path.join(path, 'scaler.npz'))
+        # TensorFlow-free copy for serving (see numpy_model.NumpyModel)
+        save_weights(self.model, os.path.join(path, NUMPY_MODEL_FILE))
     
     def load_model(self, path: str):
         """Load a trained model."""
         from tensorflow.keras.models import load_model
         
         self.model = load_model(os.path.join(path, 'mindset_model.h5'))
-        self.scaler = np.load(os.path.join(path, 'scaler.npy'), allow_pickle=True).item()
+        scaler_path = os.path.join(path, 'scaler.npz')
+        if os.path.exists(scaler_path):
+            self.load_scaler(scaler_path)
+        else:
+            # Models saved before scaler.npz pickled the whole StandardScaler
+            self.scaler = np.load(os.path.join(path, 'scaler.npy'), allow_pickle=True).item()
+    
+    def save_scaler(self, path: str):
+        """Save the fitted scaler as plain arrays, replacing ``path`` atomically."""
+        if not hasattr(self.scaler, 'mean_'):
+            raise ValueError("Scaler not fitted yet!")
+        np.savez(path + '.tmp.npz', mean=self.scaler.mean_, scale=self.scaler.scale_,
+                 var=self.scaler.var_, n_samples_seen=np.asarray(self.scaler.n_samples_seen_),
+                 feature_columns=np.asarray(self.feature_columns or [], dtype=str))
+        os.replace(path + '.tmp.npz', path)
+    
+    def load_scaler(self, path: str):
+        """Load a scaler saved by ``save_scaler``."""
+        from sklearn.preprocessing import StandardScaler
+        
+        with np.load(path, allow_pickle=False) as arrays:
+            scaler = StandardScaler()
+            scaler.mean_ = arrays['mean']
+            scaler.scale_ = arrays['scale']
+            scaler.var_ = arrays['var']
+            scaler.n_samples_seen_ = arrays['n_samples_seen'][()]
+            scaler.n_features_in_ = len(scaler.mean_)
+            if 'feature_columns' in arrays and len(arrays['feature_columns']):
+                self.feature_columns = arrays['feature_columns'].tolist()
+        self.scaler = scaler
 
 def train_model_for_date(date: datetime, data_dir: str = "data"):
     """Train model using data from a specific date."""
@@ -125,6 +340,57 @@ def train_model_for_date(date: datetime, data_dir: str = "data"):
     
     return model
 
+def train_model_for_range(start: datetime, end: datetime, model_dir: str = "models",
+                          epochs: int = 50, user_id: str = "default"):
+    """Train model using all data between two timestamps, loaded in a single pass."""
+    from collect_data import DataCollector
+    
+    collector = DataCollector()
+    data = collector.load_range(start, end, user_id=user_id)
+    
+    if 'mindset' not in data:
+        raise ValueError(f"No data found between {start} and {end}")
+    
+    model = MindsetModel()
+    X, y = model.prepare_data(data)
+    
+    if len(X) == 0:
+        raise ValueError("No valid data sequences found")
+    
+    model.train(X, y, epochs=epochs)
+    model.save_model(model_dir)
+    
+    return model
+
+def train_model_streaming(start: datetime, end: datetime, model_dir: str = "models",
+                          val_fraction: float = 0.2, epochs: int = 50, batch_size: int = 32,
+                          user_id: str = "default"):
+    """Train on a long range without loading it into memory.
+
+    The scaler is fitted incrementally over the training period, then
+    windows are streamed from the data store. The last ``val_fraction`` of
+    the range is held out for validation instead of a random split.
+    """
+    from collect_data import DataCollector
+    from input_pipeline import iter_chunks, make_dataset
+    
+    collector = DataCollector()
+    split_time = start + (end - start) * (1 - val_fraction)
+    
+    model = MindsetModel()
+    model.partial_fit_scaler(iter_chunks(collector, start, split_time, user_id=user_id))
+    if not hasattr(model.scaler, 'mean_'):
+        raise ValueError(f"No data found between {start} and {split_time}")
+    
+    train_ds = make_dataset(model, collector, start, end, split_time, 'train',
+                            batch_size=batch_size, user_id=user_id)
+    val_ds = make_dataset(model, collector, start, end, split_time, 'val',
+                          batch_size=batch_size, user_id=user_id)
+    model.train_dataset(train_ds, val_ds, epochs=epochs)
+    model.save_model(model_dir)
+    
+    return model
+
 if __name__ == "__main__":
     # Example usage
     today = datetime.now()